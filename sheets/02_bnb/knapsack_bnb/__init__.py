@@ -1,8 +1,21 @@
-from .bnb import BnBSearch
+from .batch import BatchResult, solve_batch
+from .bnb import BnBSearch, SearchResult, TerminationReason
 from .bnb_nodes import BnBNode, NodeFactory
-from .branching_strategy import BranchingStrategy
-from .heuristics import Heuristics
+from .branching_strategy import (
+    BranchingStatistics,
+    BranchingStrategy,
+    FractionalBranchingStrategy,
+    PseudoCostBranchingStrategy,
+    StrongBranchingStrategy,
+)
+from .compiled import CompiledInstance, compile_instance
+from .core import CoreSolver
+from .dfs import DepthFirstBnBSearch
+from .dynamic_programming import DynamicProgrammingSolver
+from .engine_selection import select_engine, solve
+from .heuristics import Heuristics, NoHeuristics
 from .instance import Instance, Item
+from .parallel import ParallelBnBSearch
 from .relaxation import (
     BranchingDecisions,
     FractionalSolution,
@@ -10,18 +23,37 @@ from .relaxation import (
 )
 from .search_strategy import SearchStrategy
 from .solutions import SolutionSet
+from .transposition import TranspositionTable
 
 __all__ = [
+    "BatchResult",
     "BnBNode",
     "BnBSearch",
     "BranchingDecisions",
+    "BranchingStatistics",
     "BranchingStrategy",
+    "CompiledInstance",
+    "CoreSolver",
+    "DepthFirstBnBSearch",
+    "DynamicProgrammingSolver",
+    "FractionalBranchingStrategy",
     "FractionalSolution",
     "Heuristics",
     "Instance",
     "Item",
+    "NoHeuristics",
     "NodeFactory",
+    "ParallelBnBSearch",
+    "PseudoCostBranchingStrategy",
     "RelaxationSolver",
+    "SearchResult",
     "SearchStrategy",
     "SolutionSet",
+    "StrongBranchingStrategy",
+    "TerminationReason",
+    "TranspositionTable",
+    "compile_instance",
+    "select_engine",
+    "solve",
+    "solve_batch",
 ]
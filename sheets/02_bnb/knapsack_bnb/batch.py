@@ -0,0 +1,114 @@
+"""
+Solve many instances with a pool of worker processes.
+
+Every instance is solved by its own BnBSearch in one of the workers, created
+from a benchmark `Configuration`, without progress output and without
+recording the search tree for the visualization. The results are yielded as
+soon as the instances are solved, i.e., not necessarily in the order of the
+instances. The limits apply to every instance separately.
+
+The worker processes are created as described in `process_pool`, i.e., the
+configuration only needs to be picklable if forking is not available. The
+instances and the results are always pickled.
+"""
+
+import dataclasses
+import os
+import typing
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .benchmark import Configuration
+from .bnb import SearchResult
+from .instance import Instance
+from .process_pool import create_pool, worker_args
+from .relaxation import FractionalSolution
+
+
+@dataclasses.dataclass
+class BatchResult:
+    """
+    The result of one instance of the batch. The index is the position of the
+    instance in the iterable passed to `solve_batch`.
+    """
+
+    index: int
+    instance: Instance
+    result: SearchResult
+
+
+def _solve_instance(
+    instance: Instance,
+) -> typing.Tuple[typing.Optional[typing.Tuple[float, ...]], SearchResult]:
+    """
+    Solve an instance in a worker process. Returns the selection of the best
+    solution separately, such that the instance is not sent back with it.
+    """
+    configuration, limits, search_kwargs = worker_args()
+    search = configuration.create_search(instance, **search_kwargs)
+    result = search.solve(**limits)
+    selection = result.solution.selection if result.solution is not None else None
+    result.solution = None
+    return selection, result
+
+
+def solve_batch(
+    instances: typing.Iterable[Instance],
+    configuration: Configuration,
+    num_workers: typing.Optional[int] = None,
+    max_pending: typing.Optional[int] = None,
+    iteration_limit: typing.Optional[int] = None,
+    node_limit: typing.Optional[int] = None,
+    time_limit: typing.Optional[float] = None,
+    relative_gap: typing.Optional[float] = None,
+    absolute_gap: typing.Optional[float] = None,
+    **kwargs,
+) -> typing.Iterator[BatchResult]:
+    """
+    Solve the instances with the given configuration in parallel, and yield
+    their results as they are finished.
+
+    num_workers: Number of worker processes. Defaults to the number of CPUs.
+    max_pending: The maximal number of instances submitted to the workers but
+        not yet yielded. The instances are only taken from the iterable when
+        needed, such that it can be a long-running generator. Defaults to
+        four instances per worker.
+    iteration_limit, node_limit, time_limit, relative_gap, absolute_gap:
+        The limits of every single search, see `BnBSearch.solve`.
+    Further keyword arguments are passed to every BnBSearch, e.g.,
+    `reduced_cost_fixing=True`.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 4 * num_workers
+    if max_pending <= 0:
+        msg = "At least one instance has to be pending."
+        raise ValueError(msg)
+    limits = {
+        "iteration_limit": iteration_limit,
+        "node_limit": node_limit,
+        "time_limit": time_limit,
+        "relative_gap": relative_gap,
+        "absolute_gap": absolute_gap,
+    }
+    numbered_instances = iter(enumerate(instances))
+    with create_pool(num_workers, (configuration, limits, kwargs)) as pool:
+        pending = {}
+        try:
+            while True:
+                for index, instance in numbered_instances:
+                    pending[pool.submit(_solve_instance, instance)] = (index, instance)
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, instance = pending.pop(future)
+                    selection, result = future.result()
+                    if selection is not None:
+                        result.solution = FractionalSolution(instance, selection)
+                    yield BatchResult(index=index, instance=instance, result=result)
+        finally:
+            # If the caller stops early, do not solve the remaining instances.
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,349 @@
+"""
+Benchmark the strategies of the branch and bound on the standard instance
+families of Pisinger ("Where are the hard knapsack problems?", 2005).
+
+Every combination of relaxation, search order, branching strategy, and
+heuristics is run on generated instances, and the number of nodes and
+iterations, the wall time, and the peak memory are recorded. The results can
+be written to CSV or JSON to compare strategies and spot regressions:
+
+    python -m knapsack_bnb.benchmark --sizes 20 50 --seeds 0 1 2 --output results.csv
+"""
+
+import argparse
+import csv
+import dataclasses
+import functools
+import itertools
+import json
+import math
+import random
+import time
+import tracemalloc
+import typing
+from pathlib import Path
+
+from .bnb import BnBSearch
+from .bnb_nodes import BnBNode
+from .branching_strategy import (
+    BranchingStrategy,
+    FractionalBranchingStrategy,
+    PseudoCostBranchingStrategy,
+    StrongBranchingStrategy,
+)
+from .heuristics import (
+    GreedyRoundingHeuristic,
+    Heuristics,
+    HeuristicScheduler,
+    LocalSearchHeuristic,
+    NoHeuristics,
+)
+from .instance import Instance, Item
+from .relaxation import (
+    BasicRelaxationSolver,
+    DantzigRelaxationSolver,
+    MartelloTothRelaxationSolver,
+    RelaxationSolver,
+    VectorizedRelaxationSolver,
+)
+from .search_strategy import SearchStrategy
+
+FAMILIES = (
+    "uncorrelated",
+    "weakly_correlated",
+    "strongly_correlated",
+    "inverse_strongly_correlated",
+    "subset_sum",
+    "spanner",
+)
+
+
+def _random_item(family: str, rng: random.Random, data_range: int) -> Item:
+    weight = rng.randint(1, data_range)
+    if family == "uncorrelated":
+        return Item(weight=weight, value=rng.randint(1, data_range))
+    if family == "weakly_correlated":
+        spread = data_range // 10
+        return Item(
+            weight=weight, value=max(1, rng.randint(weight - spread, weight + spread))
+        )
+    if family == "strongly_correlated":
+        return Item(weight=weight, value=weight + data_range // 10)
+    if family == "inverse_strongly_correlated":
+        value = rng.randint(1, data_range)
+        return Item(weight=value + data_range // 10, value=value)
+    if family == "subset_sum":
+        return Item(weight=weight, value=weight)
+    msg = f"Unknown instance family: {family}"
+    raise ValueError(msg)
+
+
+def generate_instance(
+    family: str,
+    num_items: int,
+    seed: int = 0,
+    data_range: int = 1000,
+    capacity_ratio: float = 0.5,
+    spanner_size: int = 2,
+    spanner_multiplier: int = 10,
+) -> Instance:
+    """
+    Generate an instance of one of the `FAMILIES`.
+
+    data_range: Weights (and values) are drawn from 1..data_range.
+    capacity_ratio: The capacity as fraction of the total weight.
+    spanner_size, spanner_multiplier: For the spanner instances, the number of
+        strongly correlated spanner items, and the maximal multiple of a
+        spanner item an item is built from.
+    """
+    rng = random.Random(seed)
+    if family == "spanner":
+        spanner = []
+        for _ in range(spanner_size):
+            item = _random_item("strongly_correlated", rng, data_range)
+            spanner.append(
+                (
+                    math.ceil(2 * item.weight / spanner_multiplier),
+                    math.ceil(2 * item.value / spanner_multiplier),
+                )
+            )
+        items = []
+        for _ in range(num_items):
+            weight, value = rng.choice(spanner)
+            multiple = rng.randint(1, spanner_multiplier)
+            items.append(Item(weight=multiple * weight, value=multiple * value))
+    else:
+        items = [_random_item(family, rng, data_range) for _ in range(num_items)]
+    capacity = int(capacity_ratio * sum(item.weight for item in items))
+    return Instance(items=items, capacity=capacity)
+
+
+class Configuration(typing.NamedTuple):
+    """
+    The components of a branch and bound search. As the components can have
+    state, the configuration holds factories and creates new components for
+    every run.
+    """
+
+    relaxation: typing.Callable[[], RelaxationSolver]
+    priority: typing.Callable[[BnBNode], typing.Any]
+    branching_strategy: typing.Callable[[], BranchingStrategy]
+    heuristics: typing.Callable[[], Heuristics]
+
+    def create_search(self, instance: Instance, **kwargs) -> BnBSearch:
+        # benchmark the components with propagation unless disabled explicitly
+        kwargs.setdefault("propagation", True)
+        return BnBSearch(
+            instance,
+            relaxation=self.relaxation(),
+            search_strategy=SearchStrategy(self.priority),
+            branching_strategy=self.branching_strategy(),
+            heuristics=self.heuristics(),
+            verbose=False,
+            log_every=None,
+            visualization=False,
+            **kwargs,
+        )
+
+
+def _best_first(node: BnBNode) -> float:
+    return -node.relaxed_solution.value()
+
+
+def _depth_first(node: BnBNode) -> typing.Tuple[int, float]:
+    return (-node.depth, -node.relaxed_solution.value())
+
+
+RELAXATIONS: typing.Dict[str, typing.Callable[[], RelaxationSolver]] = {
+    "basic": BasicRelaxationSolver,
+    "dantzig": DantzigRelaxationSolver,
+    "vectorized": VectorizedRelaxationSolver,
+    "martello_toth": MartelloTothRelaxationSolver,
+    "martello_toth_3": functools.partial(MartelloTothRelaxationSolver, depth=3),
+}
+PRIORITIES: typing.Dict[str, typing.Callable[[BnBNode], typing.Any]] = {
+    "best_first": _best_first,
+    "depth_first": _depth_first,
+}
+BRANCHING_STRATEGIES: typing.Dict[str, typing.Callable[[], BranchingStrategy]] = {
+    "fractional": FractionalBranchingStrategy,
+    "pseudo_cost": PseudoCostBranchingStrategy,
+    "strong": StrongBranchingStrategy,
+}
+HEURISTICS: typing.Dict[str, typing.Callable[[], Heuristics]] = {
+    "none": NoHeuristics,
+    "greedy": GreedyRoundingHeuristic,
+    "local_search": LocalSearchHeuristic,
+    "scheduled": HeuristicScheduler,
+}
+
+
+def configurations(
+    relaxations: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    priorities: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    branching_strategies: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    heuristics: typing.Optional[typing.Dict[str, typing.Any]] = None,
+) -> typing.Dict[str, Configuration]:
+    """
+    Build all combinations of the given components, named by the names of
+    their components joined by "/". Omitted components default to the
+    built-in ones.
+    """
+    components = [
+        relaxations or RELAXATIONS,
+        priorities or PRIORITIES,
+        branching_strategies or BRANCHING_STRATEGIES,
+        heuristics or HEURISTICS,
+    ]
+    return {
+        "/".join(names): Configuration(*(c[name] for c, name in zip(components, names)))
+        for names in itertools.product(*components)
+    }
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    """
+    The measurements of a single run.
+    """
+
+    family: str
+    num_items: int
+    seed: int
+    configuration: str
+    status: str  # the termination reason
+    value: typing.Optional[float]
+    upper_bound: float
+    num_nodes: int
+    num_iterations: int
+    time: float
+    peak_memory: typing.Optional[int]  # bytes, None if not measured
+
+
+def run_single(
+    instance: Instance,
+    configuration: Configuration,
+    iteration_limit: int = 100_000,
+    measure_memory: bool = True,
+    **kwargs,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Run a single search and return its measurements. Measuring the memory
+    with tracemalloc slows down the search noticeably, which is included
+    in the time. Further keyword arguments are passed to `BnBSearch`.
+    """
+    if measure_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        search = configuration.create_search(instance, **kwargs)
+        result = search.solve(iteration_limit=iteration_limit)
+        elapsed = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if measure_memory else None
+    finally:
+        if measure_memory:
+            tracemalloc.stop()
+    return {
+        "status": result.termination_reason.value,
+        "value": result.solution.value() if result.solution is not None else None,
+        "upper_bound": result.upper_bound,
+        "num_nodes": result.num_nodes,
+        "num_iterations": result.num_iterations,
+        "time": elapsed,
+        "peak_memory": peak_memory,
+    }
+
+
+def run_benchmark(
+    families: typing.Iterable[str] = FAMILIES,
+    sizes: typing.Iterable[int] = (20, 50),
+    seeds: typing.Iterable[int] = (0,),
+    configs: typing.Optional[typing.Dict[str, Configuration]] = None,
+    iteration_limit: int = 100_000,
+    measure_memory: bool = True,
+    verbose: bool = True,
+) -> typing.List[BenchmarkResult]:
+    """
+    Run every configuration on an instance of every family, size, and seed.
+    """
+    configs = configs if configs is not None else configurations()
+    results = []
+    for family, num_items, seed in itertools.product(families, sizes, seeds):
+        instance = generate_instance(family, num_items, seed=seed)
+        for name, configuration in configs.items():
+            measurements = run_single(
+                instance,
+                configuration,
+                iteration_limit=iteration_limit,
+                measure_memory=measure_memory,
+            )
+            result = BenchmarkResult(
+                family=family,
+                num_items=num_items,
+                seed=seed,
+                configuration=name,
+                **measurements,
+            )
+            if verbose:
+                print(
+                    f"{family:>28} {num_items:>6} {seed:>4} {name:>40} {result.status:>16} {result.num_iterations:>8} {result.time:>8.3f}s"
+                )
+            results.append(result)
+    return results
+
+
+def write_results(
+    results: typing.List[BenchmarkResult], path: typing.Union[str, Path]
+) -> None:
+    """
+    Write the results to a CSV file, or to a JSON file if the path ends with
+    ".json".
+    """
+    path = Path(path)
+    rows = [dataclasses.asdict(result) for result in results]
+    if path.suffix == ".json":
+        path.write_text(json.dumps(rows, indent=2))
+        return
+    fieldnames = [field.name for field in dataclasses.fields(BenchmarkResult)]
+    with path.open("w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--families", nargs="+", default=list(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[20, 50])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0])
+    parser.add_argument("--relaxations", nargs="+", default=list(RELAXATIONS))
+    parser.add_argument("--priorities", nargs="+", default=list(PRIORITIES))
+    parser.add_argument(
+        "--branching-strategies", nargs="+", default=list(BRANCHING_STRATEGIES)
+    )
+    parser.add_argument("--heuristics", nargs="+", default=list(HEURISTICS))
+    parser.add_argument("--iteration-limit", type=int, default=100_000)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", default="benchmark.csv")
+    args = parser.parse_args(argv)
+    configs = configurations(
+        relaxations={name: RELAXATIONS[name] for name in args.relaxations},
+        priorities={name: PRIORITIES[name] for name in args.priorities},
+        branching_strategies={
+            name: BRANCHING_STRATEGIES[name] for name in args.branching_strategies
+        },
+        heuristics={name: HEURISTICS[name] for name in args.heuristics},
+    )
+    results = run_benchmark(
+        families=args.families,
+        sizes=args.sizes,
+        seeds=args.seeds,
+        configs=configs,
+        iteration_limit=args.iteration_limit,
+        measure_memory=not args.no_memory,
+    )
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
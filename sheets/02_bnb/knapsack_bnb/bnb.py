@@ -6,16 +6,120 @@ explored. All strategies will be exponential in the worst case, but some strateg
 will still result in significantly smaller branch and bound trees than others.
 """
 
+import contextlib
+import cProfile
+import dataclasses
+import time
 import typing
+from enum import Enum
+from pathlib import Path
 
 from .bnb_nodes import BnBNode, NodeFactory, NodeStatus
-from .branching_strategy import BranchingStrategy
+from .branching_strategy import BranchingStatistics, BranchingStrategy
+from .checkpoint import (
+    decode_decisions,
+    encode_decisions,
+    instance_key,
+    read_checkpoint,
+    write_checkpoint,
+)
+from .compiled import CompiledInstance, compile_instance
 from .heuristics import Heuristics
 from .instance import Instance
+from .preprocessing import ReducedCostFixing, greedy_solution
+from .profiling import PhaseProfiler
 from .progress_tracker import ProgressTracker
 from .relaxation import FractionalSolution, RelaxationSolver
 from .search_strategy import SearchStrategy
 from .solutions import SolutionSet
+from .transposition import TranspositionTable
+from .visualization import BnBVisualization
+
+
+class TerminationReason(Enum):
+    """
+    Reason why the search ended.
+    """
+
+    OPTIMAL = "Optimal"
+    INFEASIBLE = "Infeasible"
+    GAP_LIMIT = "Gap limit"
+    TIME_LIMIT = "Time limit"
+    NODE_LIMIT = "Node limit"
+    ITERATION_LIMIT = "Iteration limit"
+
+
+@dataclasses.dataclass
+class SearchResult:
+    """
+    The outcome of a search. If a limit was reached, the solution is the best
+    one found so far, and the upper bound is the best value any solution can
+    have according to the open nodes.
+    """
+
+    solution: typing.Optional[FractionalSolution]
+    termination_reason: TerminationReason
+    upper_bound: float
+    lower_bound: float
+    gap: float
+    num_nodes: int
+    num_iterations: int
+    num_open_nodes: int
+    time: float
+    # calls, total and mean time per phase, if profiling was enabled
+    profile: typing.Optional[typing.Dict[str, typing.Dict[str, float]]] = None
+
+    @property
+    def is_optimal(self) -> bool:
+        return self.termination_reason == TerminationReason.OPTIMAL
+
+
+class _Limits:
+    """
+    The limits of a search, checked after every iteration.
+    """
+
+    def __init__(
+        self,
+        iteration_limit: typing.Optional[int] = None,
+        node_limit: typing.Optional[int] = None,
+        time_limit: typing.Optional[float] = None,
+        relative_gap: typing.Optional[float] = None,
+        absolute_gap: typing.Optional[float] = None,
+    ) -> None:
+        self.iteration_limit = iteration_limit
+        self.node_limit = node_limit
+        self.relative_gap = relative_gap
+        self.absolute_gap = absolute_gap
+        self.deadline = (
+            time.perf_counter() + time_limit if time_limit is not None else None
+        )
+
+    def reached(
+        self, progress_tracker: ProgressTracker
+    ) -> typing.Optional[TerminationReason]:
+        if self.absolute_gap is not None and (
+            progress_tracker.upper_bound() - progress_tracker.lower_bound()
+            <= self.absolute_gap
+        ):
+            return TerminationReason.GAP_LIMIT
+        if self.relative_gap is not None and (
+            progress_tracker.gap() <= self.relative_gap
+        ):
+            return TerminationReason.GAP_LIMIT
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return TerminationReason.TIME_LIMIT
+        if (
+            self.node_limit is not None
+            and progress_tracker.num_nodes >= self.node_limit
+        ):
+            return TerminationReason.NODE_LIMIT
+        if (
+            self.iteration_limit is not None
+            and progress_tracker.num_iterations >= self.iteration_limit
+        ):
+            return TerminationReason.ITERATION_LIMIT
+        return None
 
 
 class BnBSearch:
@@ -31,6 +135,18 @@ class BnBSearch:
         search_strategy: SearchStrategy,
         branching_strategy: BranchingStrategy,
         heuristics: Heuristics,
+        verbose: bool = True,
+        log_every: typing.Optional[int] = 1,
+        log_interval: typing.Optional[float] = None,
+        visualization: typing.Union[bool, BnBVisualization] = True,
+        sample_every: typing.Optional[int] = None,
+        max_samples: int = 10_000,
+        max_solutions: typing.Optional[int] = None,
+        reduced_cost_fixing: bool = False,
+        transposition_table: typing.Union[bool, TranspositionTable] = False,
+        propagation: bool = False,
+        profile: bool = False,
+        cprofile_path: typing.Union[str, Path, None] = None,
     ) -> None:
         """
         instance: knapsack problem instance
@@ -39,20 +155,94 @@ class BnBSearch:
             the order in which they are processed.
         branching_strategy: A strategy for creating decision branches based on the fractional solution
             of a node.
+        verbose, log_every, log_interval: Control the output of the ProgressTracker.
+            By default, every node is printed.
+        sample_every, max_samples: Control the metrics samples of the
+            ProgressTracker. By default, none are recorded per node with
+            verbose=False.
+        visualization: Record the search tree for the visualization. Pass a
+            BnBVisualization to configure it, or False to disable recording.
+        max_solutions: Only keep this many best solutions, at least 1. None for
+            no limit.
+        reduced_cost_fixing: Start with a greedy solution and fix all variables
+            that cannot be changed in a better solution according to the root
+            relaxation. Repeated whenever the best solution improves.
+        transposition_table: Do not enqueue nodes with the same free items and
+            fixed weight as a previous node, but at most its fixed value. Pass
+            a TranspositionTable to configure its size.
+        propagation: Fix items that do not fit anymore to 0 before solving the
+            relaxation of a node, and do not solve or enqueue nodes whose
+            fixed items already exceed the capacity. Off by default, such that
+            the search processes the same nodes as the plain algorithm.
+        profile: Measure the time spent in the phases of the search, e.g.,
+            relaxation, heuristics, branching, and queue operations.
+        cprofile_path: Profile the search loop with cProfile and dump the
+            statistics to this file, to be read with pstats.
         """
         self.instance = instance
+        # the array view of the instance, shared by the built-in components
+        self.compiled_instance: CompiledInstance = compile_instance(instance)
 
         self.relaxation = relaxation
         self.search_strategy = search_strategy
         self.branching_strategy = branching_strategy
         self.heuristics = heuristics
-        self.solutions = SolutionSet()
+        self.solutions = SolutionSet(
+            on_improvement=self._on_incumbent_improved, max_solutions=max_solutions
+        )
         self.progress_tracker = ProgressTracker(
-            instance, self.search_strategy, self.solutions
+            instance,
+            self.search_strategy,
+            self.solutions,
+            verbose=verbose,
+            log_every=log_every,
+            log_interval=log_interval,
+            visualization=visualization,
+            sample_every=sample_every,
+            max_samples=max_samples,
         )
         self.node_factory = NodeFactory(
-            instance, relaxation, on_new_node=self.progress_tracker.on_new_node_in_tree
+            instance,
+            relaxation,
+            on_new_node=self.progress_tracker.on_new_node_in_tree,
+            propagation=propagation,
+        )
+        self.reduced_cost_fixing = (
+            ReducedCostFixing(instance, relaxation) if reduced_cost_fixing else None
+        )
+        self.transposition_table: typing.Optional[TranspositionTable] = None
+        if isinstance(transposition_table, TranspositionTable):
+            self.transposition_table = transposition_table
+        elif transposition_table:
+            self.transposition_table = TranspositionTable(instance)
+        # the pseudo-costs of the items, shared with the branching strategy
+        self.branching_statistics = BranchingStatistics(
+            self.compiled_instance.num_items
         )
+        self.branching_strategy.setup(instance, relaxation, self.branching_statistics)
+        self._checkpoint_path: typing.Optional[Path] = None
+        self._checkpoint_interval = 0.0
+        self._last_checkpoint_at = 0.0
+        self.cprofile_path = cprofile_path
+        self.profiler: typing.Optional[PhaseProfiler] = None
+        if profile:
+            # the components are only instrumented while the search runs
+            self.profiler = PhaseProfiler()
+
+    def _on_incumbent_improved(self, solution: FractionalSolution) -> None:
+        # Remove all open nodes that can no longer lead to a better solution.
+        num_pruned = self.search_strategy.on_incumbent_improved(solution.value())
+        self.progress_tracker.on_nodes_pruned(num_pruned)
+        if self.reduced_cost_fixing is not None:
+            fixings = self.reduced_cost_fixing.update(solution.value())
+            self.node_factory.add_fixings(fixings)
+            self.progress_tracker.on_variables_fixed(len(fixings))
+
+    def _create_root(self) -> BnBNode:
+        if self.reduced_cost_fixing is not None:
+            # the fixing needs a solution to compare with
+            self.solutions.add(greedy_solution(self.instance))
+        return self.node_factory.create_root()
 
     def _process_node(self, node: BnBNode) -> NodeStatus:
         if not node.relaxed_solution.is_fractionally_feasible():
@@ -73,25 +263,130 @@ class BnBSearch:
             self.solutions.add(heur_sol)
             self.progress_tracker.on_heuristic_solution(node, heur_sol)
         # branch on a non-integer variable
-        for decisions in self.branching_strategy.make_branching_decisions(node):
-            child = self.node_factory.create_child(node, decisions)
+        branches = list(self.branching_strategy.make_branching_decisions(node))
+        # the branched item is the latest fixing, before the global fixings are added
+        branched_items = [next(decisions.fixed_items(), None) for decisions in branches]
+        children = self.node_factory.create_children(node, branches)
+        for branched_item, child in zip(branched_items, children):
+            if branched_item is not None:
+                self.branching_statistics.observe(
+                    node.relaxed_solution, *branched_item, child.relaxed_solution
+                )
+        num_dominated = 0
+        for child in children:
+            if child.status == NodeStatus.INFEASIBLE:
+                continue  # found by propagation, no need to process it
+            if (
+                self.transposition_table is not None
+                and self.transposition_table.is_dominated(child.branching_decisions)
+            ):
+                child.status = NodeStatus.PRUNED
+                num_dominated += 1
+                continue
             self.search_strategy.enqueue(child)
             child.status = NodeStatus.ENQUEUED
+        self.progress_tracker.on_dominated_nodes(num_dominated)
         node.status = NodeStatus.BRANCHED
         return node.status
 
-    def search(
-        self, iteration_limit: int = 10_000
-    ) -> typing.Optional[FractionalSolution]:
+    def checkpoint(self, path: typing.Union[str, Path]) -> None:
         """
-        Perform a branch-and-bound search to find the optimal fractional solution
-        for the knapsack problem instance.
+        Write the state of the search to `path`, such that it can be continued
+        with `resume`. Must not be called while a node is processed.
         """
+        open_nodes = [node for _, node in self.search_strategy.queue]
+        write_checkpoint(
+            path,
+            {
+                "instance": instance_key(self.instance),
+                "num_created_nodes": self.node_factory.num_nodes(),
+                "open_nodes": [
+                    (
+                        encode_decisions(node.branching_decisions),
+                        node.depth,
+                        node.node_id,
+                        node.parent_id,
+                    )
+                    for node in open_nodes
+                ],
+                "solutions": [
+                    solution.selection for solution in self.solutions.solutions()
+                ],
+                "fixings": dict(self.node_factory.fixings),
+                "reduced_cost_fixings": (
+                    dict(self.reduced_cost_fixing.fixings)
+                    if self.reduced_cost_fixing is not None
+                    else None
+                ),
+                "branching_statistics": (
+                    self.branching_statistics.sums,
+                    self.branching_statistics.counts,
+                ),
+                "num_nodes": self.progress_tracker.num_nodes,
+                "num_iterations": self.progress_tracker.num_iterations,
+                "num_pruned_nodes": self.progress_tracker.num_pruned_nodes,
+                "num_fixed_variables": self.progress_tracker.num_fixed_variables,
+            },
+        )
+        self._last_checkpoint_at = time.perf_counter()
+        self.progress_tracker.on_checkpoint(path)
+
+    def _restore(self, path: typing.Union[str, Path]) -> None:
+        state = read_checkpoint(path)
+        if state["instance"] != instance_key(self.instance):
+            msg = "The checkpoint belongs to a different instance."
+            raise ValueError(msg)
+        if self.node_factory.num_nodes() > 0:
+            msg = "Can only resume a search that has not been started."
+            raise ValueError(msg)
+        if (
+            self.reduced_cost_fixing is not None
+            and state["reduced_cost_fixings"] is not None
+        ):
+            self.reduced_cost_fixing.fixings.update(state["reduced_cost_fixings"])
+        self.node_factory.add_fixings(state["fixings"])
+        sums, counts = state["branching_statistics"]
+        self.branching_statistics.sums[...] = sums
+        self.branching_statistics.counts[...] = counts
+        for selection in state["solutions"]:
+            self.solutions.add(FractionalSolution(self.instance, selection))
+        num_items = len(self.instance.items)
+        open_nodes = self.node_factory.restore(
+            state["num_created_nodes"],
+            [
+                (
+                    decode_decisions(data, num_items, self.node_factory.weights),
+                    depth,
+                    node_id,
+                    parent_id,
+                )
+                for data, depth, node_id, parent_id in state["open_nodes"]
+            ],
+        )
+        for node in open_nodes:
+            self.search_strategy.enqueue(node)
+            node.status = NodeStatus.ENQUEUED
+        self.progress_tracker.on_search_resumed(open_nodes)
+        self.progress_tracker.num_nodes = state["num_nodes"]
+        self.progress_tracker.num_iterations = state["num_iterations"]
+        self.progress_tracker.num_pruned_nodes = state["num_pruned_nodes"]
+        self.progress_tracker.num_fixed_variables = state["num_fixed_variables"]
+
+    def _after_iteration(self, limits: _Limits) -> typing.Optional[TerminationReason]:
+        """
+        Write a checkpoint if it is due and check the limits.
+        """
+        if (
+            self._checkpoint_path is not None
+            and time.perf_counter() - self._last_checkpoint_at
+            >= self._checkpoint_interval
+        ):
+            self.checkpoint(self._checkpoint_path)
+        return limits.reached(self.progress_tracker)
+
+    def _search_loop(self, limits: _Limits) -> TerminationReason:
         # the branch-and-bound search start from the root node and
         # continue until the search strategy has no more nodes to explore.
-        root = self.node_factory.create_root()
-        self.search_strategy.enqueue(root)
-        self.progress_tracker.start_search()
         while self.search_strategy.has_next():
             node = self.search_strategy.next()
             self.progress_tracker.start_iteration(node)
@@ -103,9 +398,136 @@ class BnBSearch:
             ):
                 # prune the rest of the tree as it cannot contain a better solution
                 break
-            if (iteration_limit := iteration_limit - 1) <= 0:
-                # make sure we don't run forever
-                msg = "Iteration limit reached"
-                raise ValueError(msg)
-        self.progress_tracker.end_search()
-        return self.solutions.best_solution()
+            if (reason := self._after_iteration(limits)) is not None:
+                return reason
+        if self.solutions.best_solution() is None:
+            return TerminationReason.INFEASIBLE
+        return TerminationReason.OPTIMAL
+
+    def _run(
+        self,
+        start: float,
+        iteration_limit: typing.Optional[int] = None,
+        node_limit: typing.Optional[int] = None,
+        time_limit: typing.Optional[float] = None,
+        relative_gap: typing.Optional[float] = None,
+        absolute_gap: typing.Optional[float] = None,
+        checkpoint_path: typing.Union[str, Path, None] = None,
+        checkpoint_interval: float = 300.0,
+    ) -> SearchResult:
+        limits = _Limits(
+            iteration_limit=iteration_limit,
+            node_limit=node_limit,
+            time_limit=time_limit,
+            relative_gap=relative_gap,
+            absolute_gap=absolute_gap,
+        )
+        self._checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self._checkpoint_interval = checkpoint_interval
+        self._last_checkpoint_at = time.perf_counter()
+        self.progress_tracker.start_search()
+        try:
+            if self.cprofile_path is not None:
+                with cProfile.Profile() as profile:
+                    reason = self._search_loop(limits)
+                profile.dump_stats(self.cprofile_path)
+            else:
+                reason = self._search_loop(limits)
+        except BaseException:
+            self.progress_tracker.close()
+            raise
+        if self._checkpoint_path is not None:
+            self.checkpoint(self._checkpoint_path)
+        self.progress_tracker.end_search(
+            optimal=reason in (TerminationReason.OPTIMAL, TerminationReason.INFEASIBLE)
+        )
+        if self.profiler is not None:
+            self.progress_tracker.on_profile(self.profiler.report())
+        return SearchResult(
+            solution=self.solutions.best_solution(),
+            termination_reason=reason,
+            upper_bound=self.progress_tracker.upper_bound(),
+            lower_bound=self.progress_tracker.lower_bound(),
+            gap=self.progress_tracker.gap(),
+            num_nodes=self.progress_tracker.num_nodes,
+            num_iterations=self.progress_tracker.num_iterations,
+            num_open_nodes=len(self.search_strategy),
+            time=time.perf_counter() - start,
+            profile=self.profiler.breakdown() if self.profiler is not None else None,
+        )
+
+    def solve(
+        self,
+        iteration_limit: typing.Optional[int] = None,
+        node_limit: typing.Optional[int] = None,
+        time_limit: typing.Optional[float] = None,
+        relative_gap: typing.Optional[float] = None,
+        absolute_gap: typing.Optional[float] = None,
+        checkpoint_path: typing.Union[str, Path, None] = None,
+        checkpoint_interval: float = 300.0,
+    ) -> SearchResult:
+        """
+        Perform a branch-and-bound search until the optimal solution is found
+        or one of the limits is reached. Never raises on a limit, but returns
+        the best solution found so far with the proven bounds.
+
+        iteration_limit: Stop after this many processed nodes.
+        node_limit: Stop after this many created nodes.
+        time_limit: Stop after this many seconds.
+        relative_gap: Stop if (upper bound - lower bound) / upper bound is at most this.
+        absolute_gap: Stop if upper bound - lower bound is at most this.
+        checkpoint_path: Write a checkpoint to this file every `checkpoint_interval`
+            seconds and at the end, from which the search can be continued
+            with `resume`.
+        """
+        start = time.perf_counter()
+        with self._instrumented():
+            root = self._create_root()
+            self.search_strategy.enqueue(root)
+            return self._run(
+                start,
+                iteration_limit=iteration_limit,
+                node_limit=node_limit,
+                time_limit=time_limit,
+                relative_gap=relative_gap,
+                absolute_gap=absolute_gap,
+                checkpoint_path=checkpoint_path,
+                checkpoint_interval=checkpoint_interval,
+            )
+
+    def resume(self, path: typing.Union[str, Path], **kwargs) -> SearchResult:
+        """
+        Continue a search from a checkpoint written by `checkpoint` or `solve`.
+        The search has to be created for the same instance with the same
+        strategies, and must not have been started. Takes the same keyword
+        arguments as `solve`. The iteration and node limits count the
+        iterations and nodes before the checkpoint as well.
+        """
+        start = time.perf_counter()
+        with self._instrumented():
+            self._restore(path)
+            return self._run(start, **kwargs)
+
+    def _instrumented(self) -> typing.ContextManager[None]:
+        """
+        Instrument the components with the profiler, if profiling is enabled,
+        and restore them when the context is left.
+        """
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.instrumented(self)
+
+    def search(
+        self, iteration_limit: int = 10_000
+    ) -> typing.Optional[FractionalSolution]:
+        """
+        Perform a branch-and-bound search to find the optimal fractional solution
+        for the knapsack problem instance. Raises a ValueError if the iteration
+        limit is reached; use `solve` to get the best solution found instead.
+        """
+        result = self.solve(iteration_limit=iteration_limit)
+        if result.termination_reason == TerminationReason.ITERATION_LIMIT:
+            # make sure we don't run forever
+            msg = "Iteration limit reached"
+            raise ValueError(msg)
+        return result.solution
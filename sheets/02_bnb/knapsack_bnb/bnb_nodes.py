@@ -2,6 +2,9 @@ import typing
 from enum import Enum
 from typing import Optional
 
+import numpy as np
+
+from .compiled import compile_instance
 from .instance import Instance
 from .relaxation import BranchingDecisions, FractionalSolution, RelaxationSolver
 
@@ -35,7 +38,8 @@ class BnBNode:
         # There have been issues in the past with students modifying
         # the relaxed_solution and branching_decisions, leading to hard
         # to debug issues. Therefore, we make sure that these are not
-        # modified by returning copies.
+        # modified: the relaxed_solution is immutable and can be shared,
+        # the branching_decisions are returned as (cheap) copies.
         self.__relaxed_solution = relaxed_solution
         self.__branching_decisions = branching_decisions
         self.depth = depth
@@ -58,9 +62,9 @@ class BnBNode:
     @property
     def relaxed_solution(self) -> FractionalSolution:
         """
-        Return a copy of the relaxed_solution to prevent modification.
+        Return the relaxed_solution. It is immutable and thus can be shared.
         """
-        return self.__relaxed_solution.copy()
+        return self.__relaxed_solution
 
     @property
     def branching_decisions(self) -> BranchingDecisions:
@@ -80,44 +84,202 @@ class NodeFactory:
         instance: Instance,
         relaxation: RelaxationSolver,
         on_new_node: typing.Callable[[BnBNode], None],
+        propagation: bool = False,
     ) -> None:
+        """
+        propagation: Before solving the relaxation of a node, fix all items
+            to 0 that are heavier than the remaining capacity, and do not
+            solve it at all if the fixed items exceed the capacity.
+        """
         self._node_id_counter = 0
         self.instance = instance
         self.relaxation = relaxation
         self.on_new_node = on_new_node
+        self.propagation = propagation
+        # fixings that are valid for the whole search, e.g., from preprocessing
+        self.fixings: typing.Dict[int, int] = {}
+        weights = compile_instance(instance).weights
+        self.weights = weights.tolist()
+        # item indices by decreasing weight, for the propagation
+        self._heaviest_first = np.argsort(-weights, kind="stable").tolist()
+        self.num_rejected = 0  # nodes found infeasible without a relaxation
 
-    def create_root(self) -> BnBNode:
+    def add_fixings(self, fixings: typing.Dict[int, int]) -> None:
         """
-        Create and return the root node of the search tree
+        Add fixings that hold for the whole search. They are applied to all nodes
+        created from now on, unless their branching decisions fix the item
+        differently.
         """
-        root = BnBNode(
-            self.relaxation.solve(
-                self.instance, BranchingDecisions(len(self.instance.items))
-            ),
-            BranchingDecisions(len(self.instance.items)),
-            0,
+        self.fixings.update(fixings)
+
+    def _apply_fixings(self, branching_decisions: BranchingDecisions) -> None:
+        if not self.fixings:
+            return
+        fixed = {i for i, _ in branching_decisions.fixed_items()}
+        for item_index, value in self.fixings.items():
+            if item_index not in fixed:
+                branching_decisions._fix(item_index, value)
+
+    def _prepare(self, branching_decisions: BranchingDecisions) -> bool:
+        """
+        Apply the fixings and propagate the capacity. False if the node is
+        infeasible without solving its relaxation.
+        """
+        self._apply_fixings(branching_decisions)
+        if not self.propagation:
+            return True
+        if branching_decisions.propagate(self.instance.capacity, self._heaviest_first):
+            return True
+        self.num_rejected += 1
+        return False
+
+    def _solve(
+        self, branching_decisions: BranchingDecisions, feasible: bool
+    ) -> FractionalSolution:
+        if feasible:
+            return self.relaxation.solve(self.instance, branching_decisions)
+        # only the fixed items, which already exceed the capacity
+        return FractionalSolution(
+            self.instance, [1.0 if x == 1 else 0.0 for x in branching_decisions]
+        )
+
+    def _new_node(
+        self,
+        relaxed_solution: FractionalSolution,
+        branching_decisions: BranchingDecisions,
+        feasible: bool,
+        parent: Optional[BnBNode] = None,
+    ) -> BnBNode:
+        node = BnBNode(
+            relaxed_solution,
+            branching_decisions,
+            0 if parent is None else parent.depth + 1,
             self._node_id_counter,
+            parent_id=None if parent is None else parent.node_id,
         )
+        if not feasible:
+            node.status = NodeStatus.INFEASIBLE
         self._node_id_counter += 1
-        self.on_new_node(root)
-        return root
+        self.on_new_node(node)
+        return node
+
+    def create_root(
+        self, branching_decisions: Optional[BranchingDecisions] = None
+    ) -> BnBNode:
+        """
+        Create and return the root node of the search tree. By default, no
+        variables are fixed, but the search can also be restricted to a subtree
+        by passing its branching decisions.
+        """
+        if branching_decisions is None:
+            branching_decisions = BranchingDecisions(
+                len(self.instance.items), self.weights
+            )
+        elif branching_decisions.weights is None:
+            # the propagation needs the running weight of the fixed items
+            fixed_items = list(branching_decisions.fixed_items())
+            branching_decisions = BranchingDecisions(
+                len(self.instance.items), self.weights
+            )
+            for item_index, value in reversed(fixed_items):
+                branching_decisions._fix(item_index, value)
+        feasible = self._prepare(branching_decisions)
+        return self._new_node(
+            self._solve(branching_decisions, feasible), branching_decisions, feasible
+        )
 
     def create_child(
         self, parent: BnBNode, branching_decisions: BranchingDecisions
     ) -> BnBNode:
         """
         Create a child node for each decision branch of the given parent node.
+        A child that is infeasible by propagation gets the status INFEASIBLE
+        and a relaxed solution of only its fixed items.
         """
-        child = BnBNode(
-            self.relaxation.solve(self.instance, branching_decisions),
+        feasible = self._prepare(branching_decisions)
+        return self._new_node(
+            self._solve(branching_decisions, feasible),
             branching_decisions,
-            parent.depth + 1,
-            self._node_id_counter,
-            parent_id=parent.node_id,
+            feasible,
+            parent,
         )
-        self._node_id_counter += 1
-        self.on_new_node(child)
-        return child
+
+    def create_children(
+        self,
+        parent: BnBNode,
+        branching_decisions: typing.Sequence[BranchingDecisions],
+    ) -> typing.List[BnBNode]:
+        """
+        Create the child nodes for multiple branching decisions of the given parent
+        node. The relaxations of all feasible children are solved in a single
+        batch, see `create_child` for the infeasible ones.
+        """
+        feasible = [self._prepare(decisions) for decisions in branching_decisions]
+        to_solve = [d for d, f in zip(branching_decisions, feasible) if f]
+        relaxed_solutions = iter(
+            self.relaxation.solve_many(self.instance, to_solve) if to_solve else ()
+        )
+        return [
+            self._new_node(
+                next(relaxed_solutions) if f else self._solve(decisions, f),
+                decisions,
+                f,
+                parent,
+            )
+            for decisions, f in zip(branching_decisions, feasible)
+        ]
+
+    def restore(
+        self,
+        num_nodes: int,
+        nodes: typing.Sequence[
+            typing.Tuple[BranchingDecisions, int, int, Optional[int]]
+        ],
+    ) -> typing.List[BnBNode]:
+        """
+        Restore the state of the factory from a checkpoint: `num_nodes` nodes
+        have already been created, of which the given nodes with their
+        branching decisions, depth, id, and parent id are still open. Their
+        relaxations are solved again. The open nodes are not reported as new.
+        """
+        self._node_id_counter = num_nodes
+        relaxed_solutions = self.relaxation.solve_many(
+            self.instance, [decisions for decisions, *_ in nodes]
+        )
+        return [
+            BnBNode(relaxed_solution, decisions, depth, node_id, parent_id=parent_id)
+            for relaxed_solution, (decisions, depth, node_id, parent_id) in zip(
+                relaxed_solutions, nodes
+            )
+        ]
+
+    def adopt(
+        self,
+        nodes: typing.Sequence[
+            typing.Tuple[BranchingDecisions, FractionalSolution, int]
+        ],
+        parent: BnBNode,
+    ) -> typing.List[BnBNode]:
+        """
+        Create nodes whose relaxations have been solved elsewhere, e.g., the
+        open nodes of a parallel worker, from their branching decisions,
+        relaxed solution, and depth. They get new ids and `parent` as parent,
+        as their actual parents have not been created by this factory. They
+        are not reported as new, as they have been counted where created.
+        """
+        adopted = []
+        for branching_decisions, relaxed_solution, depth in nodes:
+            adopted.append(
+                BnBNode(
+                    relaxed_solution,
+                    branching_decisions,
+                    depth,
+                    self._node_id_counter,
+                    parent_id=parent.node_id,
+                )
+            )
+            self._node_id_counter += 1
+        return adopted
 
     def num_nodes(self) -> int:
         """
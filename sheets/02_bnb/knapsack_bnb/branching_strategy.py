@@ -1,7 +1,77 @@
 import typing
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from .bnb_nodes import BnBNode, BranchingDecisions
+from .instance import Instance
+from .relaxation import FractionalSolution, RelaxationSolver
+
+
+class BranchingStatistics:
+    """
+    The observed degradations of the relaxation value per unit change of an
+    item, for both directions of a branch (0: fixed to 0, 1: fixed to 1).
+    The branch and bound search records the children of every branching,
+    and strategies may add their own observations.
+
+    The sums and counts are kept in arrays indexed by direction and item,
+    such that the pseudo-costs of all items take a few array operations.
+    """
+
+    def __init__(self, num_items: int) -> None:
+        self.sums = np.zeros((2, num_items))
+        self.counts = np.zeros((2, num_items), dtype=np.int64)
+
+    def record(self, item_index: int, value: int, degradation: float) -> None:
+        """
+        Record the degradation per unit change of fixing the item to value.
+        """
+        self.sums[value, item_index] += degradation
+        self.counts[value, item_index] += 1
+
+    def observe(
+        self,
+        parent: FractionalSolution,
+        item_index: int,
+        value: int,
+        child: FractionalSolution,
+    ) -> None:
+        """
+        Record the relaxed solutions of a parent and the child in which the
+        item is fixed to value. Children that do not change the item or are
+        infeasible say nothing about the degradation and are skipped.
+        """
+        change = abs(value - parent.fraction(item_index))
+        if change == 0 or not child.is_fractionally_feasible():
+            return
+        degradation = max(0.0, parent.value() - child.value())
+        self.record(item_index, value, degradation / change)
+
+    def pseudo_costs(self) -> np.ndarray:
+        """
+        The mean degradation per unit change for every direction and item.
+        Items without observations get the mean of the observed items of the
+        direction, or 1 if there are none.
+        """
+        observed = self.counts > 0
+        costs = np.divide(
+            self.sums, self.counts, out=np.zeros_like(self.sums), where=observed
+        )
+        for direction in range(2):
+            if observed[direction].any():
+                default = costs[direction, observed[direction]].mean()
+            else:
+                default = 1.0
+            costs[direction, ~observed[direction]] = default
+        return costs
+
+    def is_reliable(self, min_observations: int) -> np.ndarray:
+        """
+        Whether each item has been observed at least `min_observations`
+        times in both directions.
+        """
+        return self.counts.min(axis=0) >= min_observations
 
 
 class BranchingStrategy(ABC):
@@ -9,6 +79,17 @@ class BranchingStrategy(ABC):
     Abstract base class for creating decision branches based on the fractional solution of a given node.
     """
 
+    def setup(  # noqa: B027
+        self,
+        instance: Instance,
+        relaxation: RelaxationSolver,
+        statistics: BranchingStatistics,
+    ) -> None:
+        """
+        Called by the search before it starts, with the relaxation solver and
+        the branching statistics of the search. Does nothing by default.
+        """
+
     @abstractmethod
     def make_branching_decisions(
         self, node: BnBNode
@@ -18,3 +99,177 @@ class BranchingStrategy(ABC):
         """
 
 
+class FractionalBranchingStrategy(BranchingStrategy):
+    """
+    Branch on the fractional variable of the relaxed solution, i.e., the break
+    item of the fractional knapsack. If there is none, branch on the first
+    variable that is not fixed yet.
+    """
+
+    def make_branching_decisions(
+        self, node: BnBNode
+    ) -> typing.Iterable[BranchingDecisions]:
+        item_index = next(iter(node.relaxed_solution.fractional_items()), None)
+        decisions = node.branching_decisions
+        if item_index is None:
+            item_index = next(i for i, x in enumerate(decisions) if x is None)
+        yield from decisions.split_on(item_index)
+
+
+class PseudoCostBranchingStrategy(BranchingStrategy):
+    """
+    Branch on the free item with the best estimated degradation of the
+    relaxation value in both children, using the pseudo-costs of the search.
+    The estimate of a child is the pseudo-cost of its direction times the
+    change of the item, e.g., x_j for fixing item j to 0. The two estimates
+    are combined into the score (1 - mu) * min + mu * max, such that
+    branchings that improve both children are preferred.
+
+    All free items are candidates, not only the fractional one, as a free
+    item that is packed completely can still be a good choice if leaving it
+    out degrades the relaxation a lot. The strategy keeps a reference to the
+    statistics of its search, so use a new one for every search.
+    """
+
+    def __init__(self, score_factor: float = 1 / 6) -> None:
+        """
+        score_factor: The weight mu of the better child in the score.
+        """
+        self.score_factor = score_factor
+        self.statistics: typing.Optional[BranchingStatistics] = None
+
+    def setup(
+        self,
+        _instance: Instance,
+        _relaxation: RelaxationSolver,
+        statistics: BranchingStatistics,
+    ) -> None:
+        self.statistics = statistics
+
+    def _score(self, down, up):
+        return (1 - self.score_factor) * np.minimum(
+            down, up
+        ) + self.score_factor * np.maximum(down, up)
+
+    def _candidates(
+        self, node: BnBNode, decisions: BranchingDecisions
+    ) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The free items, their values in the relaxed solution, and their
+        scores according to the pseudo-costs.
+        """
+        if self.statistics is None:
+            msg = "The branching strategy has not been set up by a search."
+            raise ValueError(msg)
+        selection = node.relaxed_solution.as_array()
+        free = np.ones(len(selection), dtype=bool)
+        for i, _ in decisions.fixed_items():
+            free[i] = False
+        candidates = np.flatnonzero(free)
+        x = selection[candidates]
+        pseudo_costs = self.statistics.pseudo_costs()
+        scores = self._score(
+            pseudo_costs[0, candidates] * x, pseudo_costs[1, candidates] * (1 - x)
+        )
+        return candidates, x, scores
+
+    def make_branching_decisions(
+        self, node: BnBNode
+    ) -> typing.Iterable[BranchingDecisions]:
+        decisions = node.branching_decisions
+        candidates, _, scores = self._candidates(node, decisions)
+        yield from decisions.split_on(int(candidates[np.argmax(scores)]))
+
+
+class StrongBranchingStrategy(PseudoCostBranchingStrategy):
+    """
+    Reliability branching: like the pseudo-cost branching, but the children
+    of the candidates whose pseudo-costs are not reliable yet are evaluated
+    with the relaxation solver (strong branching). The candidates are tried
+    in the order of their pseudo-cost scores, and the evaluation stops if the
+    best score has not improved for `lookahead` candidates. The degradations
+    of the trial children are recorded, such that the expensive strong
+    branching becomes rare once the pseudo-costs are reliable.
+    """
+
+    def __init__(
+        self,
+        reliability: int = 4,
+        max_candidates: int = 10,
+        lookahead: int = 4,
+        score_factor: float = 1 / 6,
+    ) -> None:
+        """
+        reliability: The number of observations per direction after which the
+            pseudo-costs of an item are trusted.
+        max_candidates: The number of candidates with the best pseudo-cost
+            scores that are considered.
+        lookahead: Stop after this many candidates without a better score.
+        score_factor: The weight mu of the better child in the score.
+        """
+        super().__init__(score_factor=score_factor)
+        self.reliability = reliability
+        self.max_candidates = max_candidates
+        self.lookahead = lookahead
+        self.instance: typing.Optional[Instance] = None
+        self.relaxation: typing.Optional[RelaxationSolver] = None
+        self.num_trials = 0  # number of children evaluated by strong branching
+
+    def setup(
+        self,
+        instance: Instance,
+        relaxation: RelaxationSolver,
+        statistics: BranchingStatistics,
+    ) -> None:
+        super().setup(instance, relaxation, statistics)
+        self.instance = instance
+        self.relaxation = relaxation
+
+    def _trial_score(
+        self, node: BnBNode, decisions: BranchingDecisions, item_index: int, x: float
+    ) -> float:
+        """
+        Solve the relaxations of both children and record their degradations.
+        An infeasible child counts as losing the complete value.
+        """
+        assert self.instance is not None, "The strategy has been set up."
+        assert self.relaxation is not None, "The strategy has been set up."
+        assert self.statistics is not None, "The strategy has been set up."
+        parent_value = node.relaxed_solution.value()
+        degradations = []
+        for value, child in enumerate(decisions.split_on(item_index)):
+            bound = self.relaxation.upper_bound(self.instance, child)
+            self.num_trials += 1
+            degradation = max(0.0, parent_value - max(bound, 0.0))
+            change = abs(value - x)
+            if change > 0 and bound > float("-inf"):
+                self.statistics.record(item_index, value, degradation / change)
+            degradations.append(degradation)
+        return float(self._score(*degradations))
+
+    def make_branching_decisions(
+        self, node: BnBNode
+    ) -> typing.Iterable[BranchingDecisions]:
+        decisions = node.branching_decisions
+        candidates, x, scores = self._candidates(node, decisions)
+        assert self.statistics is not None, "The strategy has been set up."
+        num_candidates = min(self.max_candidates, len(candidates))
+        best = np.argpartition(-scores, num_candidates - 1)[:num_candidates]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        reliable = self.statistics.is_reliable(self.reliability)
+        best_item, best_score = int(candidates[best[0]]), float("-inf")
+        without_improvement = 0
+        for k in best:
+            item_index = int(candidates[k])
+            if reliable[item_index]:
+                score = float(scores[k])
+            else:
+                score = self._trial_score(node, decisions, item_index, float(x[k]))
+            if score > best_score:
+                best_item, best_score = item_index, score
+                without_improvement = 0
+            else:
+                without_improvement += 1
+                if without_improvement >= self.lookahead:
+                    break
+        yield from decisions.split_on(best_item)
@@ -0,0 +1,96 @@
+"""
+Reading and writing checkpoints of the branch and bound search.
+
+A checkpoint contains everything needed to continue a search: the branching
+decisions of the open nodes, the solutions, the fixings of the preprocessing,
+the branching statistics, and the counters. The relaxations are not stored
+but solved again on resume.
+The branching decisions of a node are stored as a packed integer array of
+the fixed items, and the whole checkpoint is compressed.
+
+Checkpoints are written to a temporary file first that then replaces the
+old checkpoint, such that an interruption while writing never leaves a
+broken checkpoint behind.
+"""
+
+import array
+import os
+import pickle
+import tempfile
+import typing
+import zlib
+from pathlib import Path
+
+from .instance import Instance
+from .relaxation import BranchingDecisions
+
+CHECKPOINT_VERSION = 2
+
+
+def encode_decisions(branching_decisions: BranchingDecisions) -> bytes:
+    """
+    Pack the fixed items as 2*index+value, in the order they were fixed.
+    """
+    fixed_items = reversed(list(branching_decisions.fixed_items()))
+    return array.array("i", (2 * i + v for i, v in fixed_items)).tobytes()
+
+
+def decode_decisions(
+    data: bytes, num_items: int, weights: typing.Optional[typing.Sequence[int]] = None
+) -> BranchingDecisions:
+    """
+    Unpack branching decisions packed by `encode_decisions`.
+    """
+    branching_decisions = BranchingDecisions(num_items, weights)
+    packed = array.array("i")
+    packed.frombytes(data)
+    for x in packed:
+        branching_decisions._fix(x // 2, x % 2)
+    return branching_decisions
+
+
+def instance_key(instance: Instance) -> typing.Tuple:
+    """
+    A compact representation of the instance to check that a checkpoint
+    belongs to it.
+    """
+    return (
+        instance.capacity,
+        tuple((item.weight, item.value) for item in instance.items),
+    )
+
+
+def write_checkpoint(
+    path: typing.Union[str, Path], state: typing.Dict[str, typing.Any]
+) -> None:
+    """
+    Write the state atomically to `path`.
+    """
+    path = Path(path)
+    data = zlib.compress(
+        pickle.dumps(
+            {"version": CHECKPOINT_VERSION, **state}, protocol=pickle.HIGHEST_PROTOCOL
+        )
+    )
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        Path(tmp_path).replace(path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def read_checkpoint(path: typing.Union[str, Path]) -> typing.Dict[str, typing.Any]:
+    """
+    Read a state written by `write_checkpoint`. Only read checkpoints from
+    trusted sources, as they are unpickled.
+    """
+    state = pickle.loads(zlib.decompress(Path(path).read_bytes()))
+    if state.get("version") != CHECKPOINT_VERSION:
+        msg = f"Unsupported checkpoint version: {state.get('version')}"
+        raise ValueError(msg)
+    return state
@@ -0,0 +1,108 @@
+"""
+An array view of a knapsack instance for the built-in components.
+
+The pydantic `Instance` is convenient as input format, but accessing the
+attributes of its items in Python loops is slow for large instances. A
+CompiledInstance converts the items once into contiguous NumPy arrays and
+provides what most components need: the order of the items by value/weight
+ratio and the prefix sums of weights and values in this order. As sorting
+takes O(n log n) time, the order and the prefix sums are only computed on
+first access.
+
+`compile_instance` caches the compiled view per instance (by identity), so
+all components of a search share it. The cache entry is removed when the
+instance is garbage collected.
+"""
+
+import functools
+import typing
+import weakref
+
+import numpy as np
+
+from .instance import Instance
+
+
+class CompiledInstance:
+    """
+    The items of an instance as NumPy arrays. The order is by decreasing
+    value/weight ratio, with ties in index order, i.e., the same order as a
+    stable sort of the item indices by ratio. The prefix sums have a leading 0,
+    such that prefix_weights[k] is the weight of the first k items in the order.
+    Assumes positive weights.
+    """
+
+    def __init__(self, instance: Instance) -> None:
+        items = instance.items
+        self.num_items = len(items)
+        self.capacity = instance.capacity
+        self.weights = np.fromiter(
+            (item.weight for item in items), dtype=np.int64, count=len(items)
+        )
+        self.values = np.fromiter(
+            (item.value for item in items), dtype=np.int64, count=len(items)
+        )
+        self.ratios = self.values / self.weights
+        for array in (self.weights, self.values, self.ratios):
+            array.flags.writeable = False  # shared by all components
+
+    @functools.cached_property
+    def order(self) -> np.ndarray:
+        return _read_only(np.argsort(-self.ratios, kind="stable"))
+
+    @functools.cached_property
+    def rank(self) -> np.ndarray:
+        """
+        The position of each item in the order.
+        """
+        rank = np.empty(self.num_items, dtype=np.int64)
+        rank[self.order] = np.arange(self.num_items)
+        return _read_only(rank)
+
+    @functools.cached_property
+    def prefix_weights(self) -> np.ndarray:
+        return _read_only(np.concatenate(([0], np.cumsum(self.weights[self.order]))))
+
+    @functools.cached_property
+    def prefix_values(self) -> np.ndarray:
+        return _read_only(np.concatenate(([0], np.cumsum(self.values[self.order]))))
+
+    def dot_weights(self, selection: typing.Sequence[float]) -> float:
+        """
+        The total weight of the (fractional) selection.
+        """
+        return float(self.weights @ self.as_array(selection))
+
+    def dot_values(self, selection: typing.Sequence[float]) -> float:
+        """
+        The total value of the (fractional) selection.
+        """
+        return float(self.values @ self.as_array(selection))
+
+    def as_array(self, selection: typing.Sequence[float]) -> np.ndarray:
+        """
+        The selection as a float array, e.g., of a FractionalSolution.
+        """
+        return np.fromiter(selection, dtype=np.float64, count=self.num_items)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False  # shared by all components
+    return array
+
+
+_compiled_instances: typing.Dict[int, CompiledInstance] = {}
+
+
+def compile_instance(instance: Instance) -> CompiledInstance:
+    """
+    The compiled view of the instance, created on the first call and then
+    cached as long as the instance exists.
+    """
+    compiled = _compiled_instances.get(id(instance))
+    if compiled is None:
+        compiled = CompiledInstance(instance)
+        _compiled_instances[id(instance)] = compiled
+        # the id may be reused after the instance is gone
+        weakref.finalize(instance, _compiled_instances.pop, id(instance), None)
+    return compiled
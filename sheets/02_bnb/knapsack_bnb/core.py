@@ -0,0 +1,200 @@
+"""
+Solve large knapsack instances by only searching a small core problem.
+
+In the fractional knapsack, all items with a better value/weight ratio than
+the break item are packed and all with a worse one are not. In an optimal
+solution of the knapsack, this is usually still the case for all items with
+ratios far from the one of the break item. Thus, only the items around the
+break item, the core, are searched with the branch and bound (or the dynamic
+program for hard cores), while the others are fixed to their value in the
+fractional knapsack.
+
+The fixings are justified afterwards: with r the ratio of the break item,
+changing an item j from its fixed value loses at least |v_j - r*w_j| of the
+bound of the fractional knapsack (these are its reduced costs). If this
+reduced bound is not better than the solution found, the item is fixed
+correctly. Otherwise, the item is added to the core and the core problem
+is solved again. As a better solution of the larger core may justify more
+fixings, the core is at most doubled in every round, preferring the items
+with the highest bounds.
+
+The break item is found in expected linear time by partitioning around
+random ratios (Balas and Zemel), such that the running time mainly depends
+on the size of the core instead of the number of items.
+"""
+
+import random
+import typing
+
+import numpy as np
+
+from .compiled import compile_instance
+from .engine_selection import solve
+from .instance import Instance
+from .relaxation import FractionalSolution
+from .solutions import SolutionSet
+
+
+class BreakItem(typing.NamedTuple):
+    """
+    The break item of the fractional knapsack. The items are ordered by
+    decreasing ratio, with ties broken by the index.
+    """
+
+    index: int
+    ratio: float
+    packed: np.ndarray  # the items before the break item, which are packed
+    upper_bound: float  # the value of the fractional knapsack
+
+
+def find_break_item(instance: Instance, seed: int = 0) -> typing.Optional[BreakItem]:
+    """
+    Find the break item in expected linear time. None if all items fit.
+    """
+    if instance.capacity < 0:
+        msg = "The fractional knapsack is infeasible for a negative capacity."
+        raise ValueError(msg)
+    compiled = compile_instance(instance)
+    weights, values, ratios = compiled.weights, compiled.values, compiled.ratios
+    if weights.sum() <= instance.capacity:
+        return None
+    rng = random.Random(seed)
+    candidates = np.arange(len(weights))
+    remaining_capacity = instance.capacity
+    while True:
+        pivot = ratios[candidates[rng.randrange(len(candidates))]]
+        candidate_ratios = ratios[candidates]
+        higher = candidates[candidate_ratios > pivot]
+        higher_weight = weights[higher].sum()
+        if higher_weight > remaining_capacity:
+            candidates = higher
+            continue
+        remaining_capacity -= higher_weight
+        equal = candidates[candidate_ratios == pivot]  # in index order
+        cumulative_weights = np.cumsum(weights[equal])
+        num_fitting = int(
+            np.searchsorted(cumulative_weights, remaining_capacity, side="right")
+        )
+        if num_fitting < len(equal):
+            index = int(equal[num_fitting])
+            break
+        remaining_capacity -= int(cumulative_weights[-1])
+        candidates = candidates[candidate_ratios < pivot]
+    ratio = float(ratios[index])
+    packed = (ratios > ratio) | ((ratios == ratio) & (np.arange(len(ratios)) < index))
+    remaining_capacity = instance.capacity - weights[packed].sum()
+    upper_bound = float(values[packed].sum()) + remaining_capacity * ratio
+    return BreakItem(index, ratio, packed, upper_bound)
+
+
+class CoreSolver:
+    """
+    Solve the knapsack problem by searching a core problem around the break
+    item with the branch and bound, see the module documentation.
+    """
+
+    def __init__(
+        self,
+        instance: Instance,
+        core_size: int = 50,
+        engine: str = "auto",
+        iteration_limit: int = 1_000_000,
+        seed: int = 0,
+    ) -> None:
+        """
+        instance: knapsack problem instance
+        core_size: The number of items around the break item in the first core.
+        engine: The engine for the core problems, see `engine_selection.solve`.
+            By default, the branch and bound is used unless the core is small
+            enough for the dynamic program and looks hard.
+        iteration_limit: The iteration limit of the branch and bound of every core.
+        seed: The seed for the pivots when searching the break item.
+        """
+        self.instance = instance
+        self.core_size = core_size
+        self.engine = engine
+        self.iteration_limit = iteration_limit
+        self.seed = seed
+        self.solutions = SolutionSet()
+        self.core_sizes: typing.List[int] = []  # the size of every solved core
+
+    def _initial_core(self, break_item: BreakItem, ratios: np.ndarray) -> np.ndarray:
+        """
+        The break item and up to core_size/2 items with the closest ratios
+        on each side.
+        """
+        half = self.core_size // 2
+        core = np.zeros(len(ratios), dtype=bool)
+        core[break_item.index] = True
+        above = np.flatnonzero(break_item.packed)
+        below = np.flatnonzero(~break_item.packed)
+        below = below[below != break_item.index]
+        if 0 < half < len(above):
+            above = above[np.argpartition(ratios[above], half - 1)[:half]]
+        if 0 < half < len(below):
+            below = below[np.argpartition(-ratios[below], half - 1)[:half]]
+        if half > 0:
+            core[above] = True
+            core[below] = True
+        return core
+
+    def _solve_core(self, core: np.ndarray, packed: np.ndarray) -> FractionalSolution:
+        """
+        Solve the problem with all items outside the core fixed to their
+        value in the fractional knapsack.
+        """
+        items = self.instance.items
+        core_items = np.flatnonzero(core)
+        fixed_items = np.flatnonzero(packed & ~core)
+        fixed_weight = int(compile_instance(self.instance).weights[fixed_items].sum())
+        core_instance = Instance(
+            items=[items[i] for i in core_items],
+            capacity=self.instance.capacity - fixed_weight,
+        )
+        core_solution = solve(
+            core_instance, engine=self.engine, iteration_limit=self.iteration_limit
+        )
+        assert core_solution is not None, "The core problem is feasible."
+        selection = [0.0] * len(items)
+        for i in fixed_items:
+            selection[i] = 1.0
+        for i, x in zip(core_items, core_solution.selection):
+            selection[i] = x
+        return FractionalSolution(self.instance, selection)
+
+    def search(self) -> typing.Optional[FractionalSolution]:
+        """
+        Compute an optimal solution. None if there is no feasible solution,
+        i.e., the capacity is negative.
+        """
+        if self.instance.capacity < 0:
+            return None
+        break_item = find_break_item(self.instance, seed=self.seed)
+        if break_item is None:
+            solution = FractionalSolution(
+                self.instance, [1.0] * len(self.instance.items)
+            )
+            self.solutions.add(solution)
+            return solution
+        compiled = compile_instance(self.instance)
+        weights, values, ratios = compiled.weights, compiled.values, compiled.ratios
+        reduced_bounds = break_item.upper_bound - np.abs(
+            values - break_item.ratio * weights
+        )
+        core = self._initial_core(break_item, ratios)
+        while True:
+            self.core_sizes.append(int(core.sum()))
+            solution = self._solve_core(core, break_item.packed)
+            self.solutions.add(solution)
+            # values are integral, so only a bound of at least value + 1 can be better
+            failed = np.flatnonzero(
+                ~core & (reduced_bounds >= solution.value() + 1 - 1e-9)
+            )
+            if len(failed) == 0:
+                return solution
+            # at most double the core, with the items that are most likely to change
+            num_added = min(len(failed), self.core_sizes[-1])
+            if num_added < len(failed):
+                most_promising = np.argpartition(-reduced_bounds[failed], num_added - 1)
+                failed = failed[most_promising[:num_added]]
+            core[failed] = True
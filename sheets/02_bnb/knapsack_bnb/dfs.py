@@ -0,0 +1,233 @@
+"""
+A memory-bounded depth-first branch and bound for the knapsack problem.
+
+Instead of creating a node object with its own branching decisions and
+relaxed solution for every node of the search tree, this engine keeps a
+single mutable state: the items fixed to 1 on an undo stack, and the weight
+and value of these items. It branches on the items in the order of their
+value/weight ratio (Horowitz and Sahni), such that the free items are always
+a suffix of this order. The bound of the relaxation can then be updated
+incrementally from prefix sums with a binary search, and backtracking only
+needs to revert the last fixing on the undo stack. The memory is linear in
+the number of items, independent of the size of the search tree.
+
+In contrast to BnBSearch, the strategies are fixed and there is no
+visualization.
+"""
+
+import bisect
+import itertools
+import time
+import typing
+
+from .bnb import SearchResult, TerminationReason
+from .compiled import compile_instance
+from .instance import Instance
+from .progress_tracker import ProgressTracker
+from .relaxation import FractionalSolution
+from .solutions import SolutionSet
+
+
+class DepthFirstBnBSearch:
+    """
+    Perform a depth-first branch-and-bound search with an undo stack.
+    """
+
+    def __init__(self, instance: Instance) -> None:
+        """
+        instance: knapsack problem instance
+        """
+        self.instance = instance
+        self.solutions = SolutionSet()
+        self.num_nodes = 0
+        compiled = compile_instance(instance)
+        self._order = compiled.order.tolist()
+        self._weights = compiled.weights[compiled.order].tolist()
+        self._values = compiled.values[compiled.order].tolist()
+        self._prefix_weights = compiled.prefix_weights.tolist()
+        self._prefix_values = compiled.prefix_values.tolist()
+        # the unexplored subtrees of the last search, if it has been stopped
+        self._upper_bound = float("-inf")
+        self._num_open_nodes = 0
+
+    # The same definition as for BnBSearch, on the bounds of the last search.
+    gap = ProgressTracker.gap
+
+    def _break_position(self, position: int, remaining_capacity: int) -> int:
+        """
+        The position of the break item if all items from `position` on are free,
+        or the number of items if all of them fit.
+        """
+        return (
+            bisect.bisect_right(
+                self._prefix_weights,
+                remaining_capacity + self._prefix_weights[position],
+                position,
+                len(self._weights) + 1,
+            )
+            - 1
+        )
+
+    def _bound(self, position: int, remaining_capacity: int) -> float:
+        """
+        The value of the relaxation of the free items from `position` on.
+        """
+        break_position = self._break_position(position, remaining_capacity)
+        bound = self._prefix_values[break_position] - self._prefix_values[position]
+        if break_position < len(self._weights):
+            fitting_weight = (
+                self._prefix_weights[break_position] - self._prefix_weights[position]
+            )
+            bound += (
+                (remaining_capacity - fitting_weight)
+                * self._values[break_position]
+                / self._weights[break_position]
+            )
+        return bound
+
+    def _add_solution(self, taken_positions: typing.Iterable[int]) -> None:
+        selection = [0.0] * len(self._order)
+        for position in taken_positions:
+            selection[self._order[position]] = 1.0
+        self.solutions.add(FractionalSolution(self.instance, selection))
+
+    def upper_bound(self) -> float:
+        """
+        The best value any solution can have according to the subtrees that
+        the last search has not explored.
+        """
+        return max(self._upper_bound, self.lower_bound())
+
+    def lower_bound(self) -> float:
+        """
+        The value of the best solution found.
+        """
+        return self.solutions.best_solution_value()
+
+    def _stop(
+        self, position: int, undo_stack: typing.List[int]
+    ) -> typing.Tuple[float, int]:
+        """
+        The upper bound and the number of the unexplored subtrees of a stopped
+        search: the current node and, for every item on the undo stack, the
+        subtree in which it is fixed to 0.
+        """
+        capacity = self.instance.capacity
+        upper_bound = float("-inf")
+        weight, value = 0, 0
+        for last in undo_stack:
+            upper_bound = max(
+                upper_bound, value + self._bound(last + 1, capacity - weight)
+            )
+            weight += self._weights[last]
+            value += self._values[last]
+        upper_bound = max(upper_bound, value + self._bound(position, capacity - weight))
+        return upper_bound, len(undo_stack) + 1
+
+    def solve(self, iteration_limit: typing.Optional[int] = None) -> SearchResult:
+        """
+        Perform a depth-first branch-and-bound search until the optimal
+        solution is found or the iteration limit is reached. Every visited node
+        counts as an iteration. Never raises on the limit, but returns the best
+        solution found so far with the upper bound of the unexplored subtrees.
+        """
+        start = time.perf_counter()
+        num_nodes_before = self.num_nodes
+        reason = self._search(iteration_limit)
+        if reason is None:
+            reason = (
+                TerminationReason.INFEASIBLE
+                if self.solutions.best_solution() is None
+                else TerminationReason.OPTIMAL
+            )
+        return SearchResult(
+            solution=self.solutions.best_solution(),
+            termination_reason=reason,
+            upper_bound=self.upper_bound(),
+            lower_bound=self.lower_bound(),
+            gap=self.gap(),
+            num_nodes=self.num_nodes - num_nodes_before,
+            num_iterations=self.num_nodes - num_nodes_before,
+            num_open_nodes=self._num_open_nodes,
+            time=time.perf_counter() - start,
+        )
+
+    def search(
+        self, iteration_limit: typing.Optional[int] = None
+    ) -> typing.Optional[FractionalSolution]:
+        """
+        Perform a depth-first branch-and-bound search to find the optimal
+        solution for the knapsack problem instance. Raises a ValueError if the
+        iteration limit is reached, as `BnBSearch.search`; use `solve` to get
+        the best solution found instead.
+        """
+        result = self.solve(iteration_limit=iteration_limit)
+        if result.termination_reason == TerminationReason.ITERATION_LIMIT:
+            msg = "Iteration limit reached"
+            raise ValueError(msg)
+        return result.solution
+
+    def _search(
+        self, iteration_limit: typing.Optional[int]
+    ) -> typing.Optional[TerminationReason]:
+        """
+        The search loop. Returns the reason if it has been stopped by a limit,
+        and leaves the bounds of the unexplored subtrees for the result.
+        """
+        self._upper_bound, self._num_open_nodes = float("-inf"), 0
+        capacity = self.instance.capacity
+        if capacity < 0:
+            # not even the empty selection fits
+            return None
+        n = len(self._weights)
+        weights, values = self._weights, self._values
+        prefix_weights, prefix_values = self._prefix_weights, self._prefix_values
+        best_value = self.solutions.best_solution_value()
+        undo_stack: typing.List[int] = []  # positions fixed to 1
+        position, weight, value = 0, 0, 0  # items before position are fixed
+        num_iterations = 0
+        while True:
+            if iteration_limit is not None and num_iterations >= iteration_limit:
+                self._upper_bound, self._num_open_nodes = self._stop(
+                    position, undo_stack
+                )
+                return TerminationReason.ITERATION_LIMIT
+            num_iterations += 1
+            self.num_nodes += 1
+            remaining_capacity = capacity - weight
+            # inlined _bound, as this is the hot loop
+            break_position = self._break_position(position, remaining_capacity)
+            bound = value + prefix_values[break_position] - prefix_values[position]
+            if break_position < n:
+                fitting_weight = (
+                    prefix_weights[break_position] - prefix_weights[position]
+                )
+                bound += (
+                    (remaining_capacity - fitting_weight)
+                    * values[break_position]
+                    / weights[break_position]
+                )
+            if bound > best_value:
+                if break_position == n:
+                    # all free items fit, i.e., the relaxation is integral
+                    best_value = bound
+                    self._add_solution(itertools.chain(undo_stack, range(position, n)))
+                elif weights[position] <= remaining_capacity:
+                    # fix the next item to 1
+                    undo_stack.append(position)
+                    weight += weights[position]
+                    value += values[position]
+                    position += 1
+                    continue
+                else:
+                    # the next item does not fit anymore, fix it to 0
+                    position += 1
+                    continue
+            # backtrack: revert the last fixing to 1 and fix the item to 0 instead
+            if not undo_stack:
+                break
+            last = undo_stack.pop()
+            weight -= weights[last]
+            value -= values[last]
+            position = last + 1
+        return None
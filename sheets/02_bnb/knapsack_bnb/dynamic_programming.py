@@ -0,0 +1,67 @@
+"""
+A pseudo-polynomial dynamic program for the knapsack problem.
+
+For every item, the best value for every capacity 0..C is updated with NumPy
+array operations, which takes O(n*C) time. Instead of the full table, only a
+bit per item and capacity is stored, telling whether the item improved the
+value for this capacity. This suffices to reconstruct the solution and needs
+n*C/8 bytes. For moderate capacities, this is much faster than the branch and
+bound on hard instances with correlated weights and values.
+"""
+
+import typing
+
+import numpy as np
+
+from .compiled import compile_instance
+from .instance import Instance
+from .relaxation import FractionalSolution
+from .solutions import SolutionSet
+
+
+class DynamicProgrammingSolver:
+    """
+    Solve the knapsack problem by dynamic programming over the capacity.
+    """
+
+    def __init__(self, instance: Instance) -> None:
+        """
+        instance: knapsack problem instance with integral weights and capacity
+        """
+        self.instance = instance
+        self.solutions = SolutionSet()
+
+    def search(self) -> typing.Optional[FractionalSolution]:
+        """
+        Compute an optimal solution. None if there is no feasible solution,
+        i.e., the capacity is negative.
+        """
+        capacity = self.instance.capacity
+        compiled = compile_instance(self.instance)
+        weights, values = compiled.weights.tolist(), compiled.values.tolist()
+        if capacity < 0:
+            return None
+        # best[c]: best value of the items so far with a weight of at most c
+        best = np.zeros(capacity + 1, dtype=np.int64)
+        # improved[k] is the bitset of the capacities for which item k improved best
+        improved = np.zeros((len(weights), (capacity + 8) // 8), dtype=np.uint8)
+        for k, (weight, value) in enumerate(zip(weights, values)):
+            if weight > capacity:
+                continue
+            with_item = best[: capacity + 1 - weight] + value
+            is_better = with_item > best[weight:]
+            best[weight:] = np.where(is_better, with_item, best[weight:])
+            mask = np.zeros(capacity + 1, dtype=bool)
+            mask[weight:] = is_better
+            improved[k] = np.packbits(mask)
+        # go backwards through the items and follow the improvements
+        selection = [0.0] * len(weights)
+        remaining_capacity = capacity
+        for k in reversed(range(len(weights))):
+            byte = improved[k, remaining_capacity >> 3]
+            if (byte >> (7 - (remaining_capacity & 7))) & 1:
+                selection[k] = 1.0
+                remaining_capacity -= weights[k]
+        solution = FractionalSolution(self.instance, selection)
+        self.solutions.add(solution)
+        return solution
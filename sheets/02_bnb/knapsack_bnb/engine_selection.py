@@ -0,0 +1,97 @@
+"""
+Automatically select between the dynamic program and the branch and bound.
+
+The dynamic program needs O(n*C) time and n*C/8 bytes independent of the
+instance, while the branch and bound is very fast on most instances but can
+explode on instances with strongly correlated weights and values. Small
+tables are always solved by the dynamic program, larger ones only if the
+instance looks hard and the table still fits the limit.
+"""
+
+import typing
+
+import numpy as np
+
+from .bnb import BnBSearch
+from .branching_strategy import FractionalBranchingStrategy
+from .compiled import compile_instance
+from .dynamic_programming import DynamicProgrammingSolver
+from .heuristics import NoHeuristics
+from .instance import Instance
+from .relaxation import DantzigRelaxationSolver, FractionalSolution
+from .search_strategy import SearchStrategy
+
+
+def estimate_hardness(instance: Instance) -> float:
+    """
+    Estimate how hard the instance is for the branch and bound, as a value
+    between 0 (easy) and 1 (hard). Uses the correlation between weights and
+    values: if the value/weight ratios are similar, the relaxation is weak
+    and a lot of branching is necessary.
+    """
+    if len(instance.items) < 2:
+        return 0.0
+    compiled = compile_instance(instance)
+    weights, values = compiled.weights, compiled.values
+    if weights.std() == 0 or values.std() == 0:
+        return 0.0
+    return max(0.0, float(np.corrcoef(weights, values)[0, 1]))
+
+
+def select_engine(
+    instance: Instance,
+    max_dp_cells: int = 10**8,
+    always_dp_cells: int = 10**6,
+    hardness_threshold: float = 0.9,
+) -> str:
+    """
+    Select "dp" or "bnb" for the instance.
+
+    max_dp_cells: Never use the dynamic program for more items times capacity.
+    always_dp_cells: Always use the dynamic program for at most this many cells.
+    hardness_threshold: Use the dynamic program in between if the estimated
+        hardness is at least this value.
+    """
+    num_cells = len(instance.items) * (max(instance.capacity, 0) + 1)
+    if num_cells <= always_dp_cells:
+        return "dp"
+    if num_cells <= max_dp_cells and estimate_hardness(instance) >= hardness_threshold:
+        return "dp"
+    return "bnb"
+
+
+def solve(
+    instance: Instance,
+    engine: str = "auto",
+    iteration_limit: int = 1_000_000,
+    **kwargs,
+) -> typing.Optional[FractionalSolution]:
+    """
+    Solve the knapsack problem with the dynamic program or the branch and bound.
+
+    engine: "dp", "bnb", or "auto" to use `select_engine`.
+    iteration_limit: The iteration limit of the branch and bound.
+    Further keyword arguments are passed to `select_engine`.
+    """
+    if engine == "auto":
+        engine = select_engine(instance, **kwargs)
+    if engine == "dp":
+        return DynamicProgrammingSolver(instance).search()
+    if engine == "bnb":
+        bnb = BnBSearch(
+            instance,
+            relaxation=DantzigRelaxationSolver(),
+            search_strategy=SearchStrategy(
+                priority=lambda node: -node.relaxed_solution.value()
+            ),
+            branching_strategy=FractionalBranchingStrategy(),
+            heuristics=NoHeuristics(),
+            verbose=False,
+            log_every=None,
+            visualization=False,
+            reduced_cost_fixing=True,
+            propagation=True,
+        )
+        return bnb.search(iteration_limit=iteration_limit)
+    msg = f"Unknown engine: {engine}"
+    raise ValueError(msg)
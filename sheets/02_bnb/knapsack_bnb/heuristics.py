@@ -1,8 +1,13 @@
+import itertools
 import math
+import time
 import typing
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from .bnb_nodes import BnBNode, FractionalSolution
+from .compiled import compile_instance
 from .instance import Instance
 
 
@@ -20,3 +25,249 @@ class Heuristics(ABC):
         """
 
 
+class NoHeuristics(Heuristics):
+    """
+    Do not search for solutions. Solutions are then only found by integral
+    relaxations (or preprocessing).
+    """
+
+    def search(
+        self, _instance: Instance, _node: BnBNode
+    ) -> typing.Iterable[FractionalSolution]:
+        return ()
+
+
+class GreedyRoundingHeuristic(Heuristics):
+    """
+    Round down the relaxed solution of the node, i.e., drop its fractional
+    item, and fill the remaining capacity greedily with the unpacked items
+    of the best value/weight ratios. The items may be fixed to 0 in the node,
+    as the solution only has to be feasible for the whole instance.
+
+    The items are sorted only once per instance, so a solution takes O(n).
+    """
+
+    def __init__(self) -> None:
+        self._instance: typing.Optional[Instance] = None
+        self._order: typing.List[int] = []  # item indices sorted by value/weight
+        self._weights: typing.List[int] = []
+
+    def _prepare(self, instance: Instance) -> None:
+        if self._instance is instance:
+            return
+        compiled = compile_instance(instance)
+        self._order = compiled.order.tolist()
+        self._weights = compiled.weights.tolist()
+        self._instance = instance
+
+    def ratio_order(self, instance: Instance) -> typing.List[int]:
+        """
+        The item indices sorted by decreasing value/weight ratio.
+        """
+        self._prepare(instance)
+        return self._order
+
+    def fill(
+        self, instance: Instance, selection: typing.Sequence[float]
+    ) -> typing.Optional[FractionalSolution]:
+        """
+        Keep the fully packed items of the selection and greedily add further
+        items. None if the packed items already exceed the capacity.
+        """
+        self._prepare(instance)
+        weights = self._weights
+        packed = [1.0 if x == 1 else 0.0 for x in selection]
+        remaining_capacity = instance.capacity - sum(
+            w for w, x in zip(weights, packed) if x
+        )
+        if remaining_capacity < 0:
+            return None
+        for i in self._order:
+            if not packed[i] and weights[i] <= remaining_capacity:
+                packed[i] = 1.0
+                remaining_capacity -= weights[i]
+        return FractionalSolution(instance, packed)
+
+    def search(
+        self, instance: Instance, node: BnBNode
+    ) -> typing.Iterable[FractionalSolution]:
+        if not node.relaxed_solution.is_fractionally_feasible():
+            return
+        solution = self.fill(instance, node.relaxed_solution.selection)
+        if solution is not None:
+            yield solution
+
+
+class LocalSearchHeuristic(Heuristics):
+    """
+    Improve the solutions of another heuristic by exchanging items. A 1-swap
+    replaces a packed item by an unpacked one, a 2-swap replaces two packed
+    items by one unpacked item or the other way around. The best improving
+    swap is applied and the free capacity filled greedily, until there is
+    no improving swap anymore.
+
+    Only the `neighborhood` packed items of the worst and unpacked items of
+    the best value/weight ratio are considered for the swaps, such that a
+    round takes O(n + neighborhood^3), evaluated with NumPy.
+    """
+
+    def __init__(
+        self,
+        heuristic: typing.Optional[Heuristics] = None,
+        neighborhood: int = 15,
+        two_swaps: bool = True,
+        max_swaps: int = 100,
+    ) -> None:
+        """
+        heuristic: The heuristic whose solutions are improved. Defaults to
+            GreedyRoundingHeuristic.
+        neighborhood: The number of packed and unpacked items considered.
+        two_swaps: Also try 2-swaps, not only 1-swaps.
+        max_swaps: The maximal number of swaps per solution.
+        """
+        self.heuristic = heuristic or GreedyRoundingHeuristic()
+        self.neighborhood = neighborhood
+        self.two_swaps = two_swaps
+        self.max_swaps = max_swaps
+        self._greedy = GreedyRoundingHeuristic()
+
+    def _best_swap(
+        self,
+        instance: Instance,
+        packed: typing.List[int],
+        unpacked: typing.List[int],
+        remaining_capacity: int,
+    ) -> typing.Optional[typing.Tuple[typing.Tuple[int, ...], typing.Tuple[int, ...]]]:
+        """
+        The packed and unpacked items of the most improving swap, if any.
+        All swaps of a kind are evaluated at once as a matrix of the removed
+        against the added items.
+        """
+        if not packed or not unpacked:
+            return None
+        compiled = compile_instance(instance)
+        # every row of the index arrays is one group of items to remove or add
+        outs = np.array(packed)[:, np.newaxis]
+        ins = np.array(unpacked)[:, np.newaxis]
+        kinds = [(outs, ins)]
+        if self.two_swaps:
+            if len(packed) >= 2:
+                kinds.append((np.array(list(itertools.combinations(packed, 2))), ins))
+            if len(unpacked) >= 2:
+                kinds.append(
+                    (outs, np.array(list(itertools.combinations(unpacked, 2))))
+                )
+        best_swap, best_gain = None, 0
+        for removed, added in kinds:
+            removed_values = compiled.values[removed].sum(axis=1)
+            removed_weights = compiled.weights[removed].sum(axis=1)
+            added_values = compiled.values[added].sum(axis=1)
+            added_weights = compiled.weights[added].sum(axis=1)
+            gains = added_values[np.newaxis, :] - removed_values[:, np.newaxis]
+            fits = (
+                added_weights[np.newaxis, :] - removed_weights[:, np.newaxis]
+                <= remaining_capacity
+            )
+            gains[~fits] = 0
+            r, a = np.unravel_index(np.argmax(gains), gains.shape)
+            if gains[r, a] > best_gain:
+                best_swap = (tuple(removed[r].tolist()), tuple(added[a].tolist()))
+                best_gain = gains[r, a]
+        return best_swap
+
+    def improve(
+        self, instance: Instance, solution: FractionalSolution
+    ) -> FractionalSolution:
+        """
+        Apply improving swaps to the (integral) solution.
+        """
+        order = self._greedy.ratio_order(instance)
+        weights = compile_instance(instance).weights
+        selection = list(solution.selection)
+        remaining_capacity = instance.capacity - solution.weight()
+        for _ in range(self.max_swaps):
+            packed = [i for i in reversed(order) if selection[i]][: self.neighborhood]
+            unpacked = [i for i in order if not selection[i]][: self.neighborhood]
+            swap = self._best_swap(instance, packed, unpacked, remaining_capacity)
+            if swap is None:
+                break
+            outs, ins = swap
+            for o in outs:
+                selection[o] = 0.0
+                remaining_capacity += weights[o]
+            for i in ins:
+                selection[i] = 1.0
+                remaining_capacity -= weights[i]
+            filled = self._greedy.fill(instance, selection)
+            assert filled is not None, "Swaps keep the solution feasible."
+            selection = list(filled.selection)
+            remaining_capacity = instance.capacity - filled.weight()
+        return FractionalSolution(instance, selection)
+
+    def search(
+        self, instance: Instance, node: BnBNode
+    ) -> typing.Iterable[FractionalSolution]:
+        for solution in self.heuristic.search(instance, node):
+            yield self.improve(instance, solution)
+
+
+class HeuristicScheduler(Heuristics):
+    """
+    Run heuristics only at some nodes, as running them at every node is
+    usually too expensive: at the root, at every k-th node, and at every node
+    whose depth is a multiple of a given frequency, as long as the total time
+    of the heuristics is within a budget. A scheduler keeps track of the
+    nodes and time of a search, so use a new one for every search.
+    """
+
+    def __init__(
+        self,
+        heuristics: typing.Optional[typing.Sequence[Heuristics]] = None,
+        at_root: bool = True,
+        every_k_nodes: typing.Optional[int] = 100,
+        depth_frequency: typing.Optional[int] = None,
+        time_budget: typing.Optional[float] = None,
+    ) -> None:
+        """
+        heuristics: The heuristics to run. Defaults to a local search on the
+            greedy rounding.
+        at_root: Run the heuristics at the root.
+        every_k_nodes: Run the heuristics at every k-th node they are asked for.
+            None to disable.
+        depth_frequency: Run the heuristics at the depths 0, f, 2f, ...
+            None to disable.
+        time_budget: The total time in seconds the heuristics may take in the
+            search. None for no limit.
+        """
+        self.heuristics = (
+            list(heuristics) if heuristics is not None else [LocalSearchHeuristic()]
+        )
+        self.at_root = at_root
+        self.every_k_nodes = every_k_nodes
+        self.depth_frequency = depth_frequency
+        self.time_budget = time_budget
+        self.num_calls = 0
+        self.num_runs = 0
+        self.time_used = 0.0
+
+    def _is_due(self, node: BnBNode) -> bool:
+        if self.at_root and node.depth == 0:
+            return True
+        if self.every_k_nodes and self.num_calls % self.every_k_nodes == 0:
+            return True
+        return bool(self.depth_frequency) and node.depth % self.depth_frequency == 0
+
+    def search(
+        self, instance: Instance, node: BnBNode
+    ) -> typing.Iterable[FractionalSolution]:
+        self.num_calls += 1
+        if not self._is_due(node):
+            return
+        if self.time_budget is not None and self.time_used >= self.time_budget:
+            return
+        self.num_runs += 1
+        for heuristic in self.heuristics:
+            start = time.perf_counter()
+            solutions = list(heuristic.search(instance, node))
+            self.time_used += time.perf_counter() - start
+            yield from solutions
@@ -0,0 +1,395 @@
+"""
+A parallel version of the branch and bound search.
+
+The search first proceeds serially until there are enough open nodes. The
+subtrees below these nodes are then searched by a pool of worker processes,
+each with its own copy of the strategies. The value of the best solution is
+shared between all workers, such that every worker can prune with the
+solutions found by the others. As every worker only prunes nodes that cannot
+beat a solution found by some worker, the best solution value equals the one
+of the serial search. If there are multiple optimal solutions, a different
+one may be returned.
+
+The limits apply to the whole search. The workers count their nodes and
+iterations in counters shared with the main process, and stop at the same
+deadline. As every worker checks the limits before each of its iterations,
+the iteration and node limits can be exceeded by a few nodes per worker. A
+worker stopped by a limit returns its open nodes, which are added to the
+queue of the main process, such that the bounds of the result and a final
+checkpoint include them.
+
+The worker processes are created as described in `process_pool`.
+"""
+
+import copy
+import os
+import typing
+from concurrent.futures import as_completed
+
+from .bnb import BnBSearch, TerminationReason, _Limits
+from .bnb_nodes import BnBNode, NodeFactory, NodeStatus
+from .branching_strategy import BranchingStatistics, BranchingStrategy
+from .heuristics import Heuristics
+from .instance import Instance
+from .process_pool import create_pool, get_context, worker_args
+from .progress_tracker import ProgressTracker
+from .relaxation import BranchingDecisions, FractionalSolution, RelaxationSolver
+from .search_strategy import SearchStrategy
+from .solutions import SolutionSet
+
+
+class _SharedIncumbentSolutionSet(SolutionSet):
+    """
+    A solution set that also considers the best solution value of the other
+    workers, and publishes its own improvements to them.
+    """
+
+    def __init__(self, shared_value, on_improvement=None) -> None:
+        super().__init__(on_improvement=on_improvement)
+        self._shared_value = shared_value
+
+    def add(self, solution: FractionalSolution) -> None:
+        super().add(solution)
+        value = solution.value()
+        if value > self._shared_value.value:
+            with self._shared_value.get_lock():
+                if value > self._shared_value.value:
+                    self._shared_value.value = value
+
+    def best_solution_value(self) -> float:
+        return max(super().best_solution_value(), self._shared_value.value)
+
+
+class _SubtreeTracker:
+    """
+    Only counts the nodes and iterations of a worker, and publishes them to the
+    counters shared by all processes, such that the limits can be checked as
+    in the main process. The bounds are the ones of the subtree. Printing and
+    visualizing is left to the main process.
+    """
+
+    # The same definitions as in the main process, on the subtree.
+    upper_bound = ProgressTracker.upper_bound
+    lower_bound = ProgressTracker.lower_bound
+    gap = ProgressTracker.gap
+
+    def __init__(
+        self, search_strategy: SearchStrategy, solutions: SolutionSet, shared_counts
+    ) -> None:
+        """
+        shared_counts: The number of nodes and iterations of all processes.
+        """
+        self.search_strategy = search_strategy
+        self.solutions = solutions
+        self._shared_counts = shared_counts
+        self.num_subtree_nodes = 0
+        self.num_subtree_iterations = 0
+        # the subtree root has already been counted by the main process
+        self._num_published_nodes = 1
+        self._num_published_iterations = 0
+
+    @property
+    def num_nodes(self) -> int:
+        return self._shared_counts[0]
+
+    @property
+    def num_iterations(self) -> int:
+        return self._shared_counts[1]
+
+    def publish(self) -> None:
+        """
+        Add the nodes and iterations since the last call to the shared counters.
+        """
+        with self._shared_counts.get_lock():
+            self._shared_counts[0] += self.num_subtree_nodes - self._num_published_nodes
+            self._shared_counts[1] += (
+                self.num_subtree_iterations - self._num_published_iterations
+            )
+        self._num_published_nodes = self.num_subtree_nodes
+        self._num_published_iterations = self.num_subtree_iterations
+
+    def on_new_node_in_tree(self, _node: BnBNode) -> None:
+        self.num_subtree_nodes += 1
+
+    def on_heuristic_solution(self, node, solution) -> None:
+        pass
+
+    def on_nodes_pruned(self, num_pruned: int) -> None:
+        pass
+
+    def on_dominated_nodes(self, num_dominated: int) -> None:
+        pass
+
+    def start_iteration(self, _node: BnBNode) -> None:
+        self.num_subtree_iterations += 1
+
+    def end_iteration(self, status) -> None:
+        pass
+
+
+class _SubtreeSearch(BnBSearch):
+    """
+    Search the subtree below the given branching decisions in a worker.
+    """
+
+    def __init__(
+        self,
+        instance: Instance,
+        relaxation: RelaxationSolver,
+        search_strategy: SearchStrategy,
+        branching_strategy: BranchingStrategy,
+        heuristics: Heuristics,
+        shared_value,
+        shared_counts,
+        propagation: bool = False,
+    ) -> None:
+        self.instance = instance
+        self.relaxation = relaxation
+        self.search_strategy = search_strategy
+        self.branching_strategy = branching_strategy
+        self.heuristics = heuristics
+        self.solutions = _SharedIncumbentSolutionSet(
+            shared_value, on_improvement=self._on_incumbent_improved
+        )
+        self.progress_tracker = _SubtreeTracker(
+            self.search_strategy, self.solutions, shared_counts
+        )
+        self.node_factory = NodeFactory(
+            instance,
+            relaxation,
+            on_new_node=self.progress_tracker.on_new_node_in_tree,
+            propagation=propagation,
+        )
+        # The fixings of the main process are already part of the subtree roots.
+        self.reduced_cost_fixing = None
+        self.transposition_table = None
+        self.branching_statistics = BranchingStatistics(len(instance.items))
+        self.branching_strategy.setup(instance, relaxation, self.branching_statistics)
+
+    def search_subtree(
+        self, branching_decisions: BranchingDecisions, limits: _Limits
+    ) -> typing.Optional[TerminationReason]:
+        """
+        Search the subtree below the branching decisions. Returns the limit
+        that stopped the search, or None if the subtree has been searched
+        completely. The gap limits are checked on the bounds of the subtree,
+        which suffices, as the overall upper bound is the maximum over the
+        subtrees and the lower bound is shared.
+        """
+        root = self.node_factory.create_root(branching_decisions)
+        self.search_strategy.enqueue(root)
+        while self.search_strategy.has_next():
+            if (reason := limits.reached(self.progress_tracker)) is not None:
+                return reason
+            node = self.search_strategy.next()
+            self.progress_tracker.start_iteration(node)
+            status = self._process_node(node)
+            self.progress_tracker.end_iteration(status)
+            self.progress_tracker.publish()
+            if (
+                self.search_strategy.upper_bound()
+                <= self.solutions.best_solution_value()
+            ):
+                break
+        return None
+
+
+def _search_subtree(
+    branching_decisions: BranchingDecisions,
+) -> typing.Tuple[
+    typing.Optional[typing.Tuple[float, ...]],
+    int,
+    int,
+    typing.Optional[TerminationReason],
+    typing.List[typing.Tuple[BranchingDecisions, typing.Tuple[float, ...], int]],
+]:
+    """
+    Search a subtree in a worker process. Returns the selection of the best
+    solution found (if any), the number of nodes created below the subtree
+    root, the number of iterations, the limit that stopped the search (if
+    any), and then the branching decisions, relaxed selection, and depth of
+    the open nodes.
+    """
+    (
+        instance,
+        relaxation,
+        search_strategy,
+        branching_strategy,
+        heuristics,
+        shared_value,
+        shared_counts,
+        limits,
+        propagation,
+    ) = worker_args()
+    search = _SubtreeSearch(
+        instance,
+        relaxation,
+        copy.deepcopy(search_strategy),
+        branching_strategy,
+        heuristics,
+        shared_value,
+        shared_counts,
+        propagation,
+    )
+    reason = search.search_subtree(branching_decisions, limits)
+    solution = search.solutions.best_solution()
+    open_nodes = []
+    if reason is not None:
+        open_nodes = [
+            (node.branching_decisions, node.relaxed_solution.selection, node.depth)
+            for node in search.search_strategy.nodes_in_queue()
+        ]
+    return (
+        solution.selection if solution is not None else None,
+        search.progress_tracker.num_subtree_nodes - 1,
+        search.progress_tracker.num_subtree_iterations,
+        reason,
+        open_nodes,
+    )
+
+
+class ParallelBnBSearch(BnBSearch):
+    """
+    Perform the branch-and-bound search with multiple processes. Takes the same
+    strategies as BnBSearch.
+    """
+
+    def __init__(
+        self,
+        instance: Instance,
+        relaxation: RelaxationSolver,
+        search_strategy: SearchStrategy,
+        branching_strategy: BranchingStrategy,
+        heuristics: Heuristics,
+        num_workers: typing.Optional[int] = None,
+        subtrees_per_worker: int = 4,
+        **kwargs,
+    ) -> None:
+        """
+        num_workers: Number of worker processes. Defaults to the number of CPUs.
+        subtrees_per_worker: The serial search continues until there are this
+            many open nodes per worker, to balance the load between the workers.
+        Further keyword arguments are passed to BnBSearch.
+        """
+        # A copy of the empty search strategy for the subtrees of the workers.
+        self._search_strategy_prototype = copy.deepcopy(search_strategy)
+        super().__init__(
+            instance,
+            relaxation,
+            search_strategy,
+            branching_strategy,
+            heuristics,
+            **kwargs,
+        )
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.subtrees_per_worker = subtrees_per_worker
+
+    def _search_in_parallel(
+        self, limits: _Limits
+    ) -> typing.Optional[TerminationReason]:
+        """
+        Search the subtrees of all open nodes with the worker processes.
+        Returns the limit that stopped the search, if open nodes are left.
+        """
+        context = get_context()
+        shared_value = context.Value("d", self.solutions.best_solution_value())
+        shared_counts = context.Array(
+            "q", [self.progress_tracker.num_nodes, self.progress_tracker.num_iterations]
+        )
+        subtrees = []
+        while self.search_strategy.has_next():
+            subtrees.append(self.search_strategy.next())
+        with create_pool(
+            self.num_workers,
+            (
+                self.instance,
+                self.relaxation,
+                self._search_strategy_prototype,
+                self.branching_strategy,
+                self.heuristics,
+                shared_value,
+                shared_counts,
+                # The deadline is a time.perf_counter() value, which is the
+                # same clock in all processes.
+                limits,
+                self.node_factory.propagation,
+            ),
+            context,
+        ) as pool:
+            futures = {
+                pool.submit(_search_subtree, node.branching_decisions): node
+                for node in subtrees
+            }
+            reasons = []
+            for future in as_completed(futures):
+                selection, num_nodes, num_iterations, reason, open_nodes = (
+                    future.result()
+                )
+                if selection is not None:
+                    self.solutions.add(FractionalSolution(self.instance, selection))
+                self.progress_tracker.on_subtree_searched(
+                    futures[future], num_nodes, num_iterations
+                )
+                if reason is not None:
+                    reasons.append(reason)
+                    self._adopt_open_nodes(futures[future], open_nodes)
+        if reasons and self.search_strategy.has_next():
+            return reasons[0]
+        return None
+
+    def _adopt_open_nodes(
+        self,
+        subtree_root: BnBNode,
+        open_nodes: typing.List[
+            typing.Tuple[BranchingDecisions, typing.Tuple[float, ...], int]
+        ],
+    ) -> None:
+        """
+        Enqueue the open nodes of a subtree whose search was stopped by a
+        limit, unless they cannot lead to a better solution anymore.
+        """
+        best_value = self.solutions.best_solution_value()
+        relaxed_solutions = [
+            FractionalSolution(self.instance, selection)
+            for _, selection, _ in open_nodes
+        ]
+        nodes = self.node_factory.adopt(
+            [
+                (branching_decisions, relaxed_solution, depth)
+                for (branching_decisions, _, depth), relaxed_solution in zip(
+                    open_nodes, relaxed_solutions
+                )
+                if relaxed_solution.is_fractionally_feasible()
+                and relaxed_solution.value() > best_value
+            ],
+            subtree_root,
+        )
+        for node in nodes:
+            self.search_strategy.enqueue(node)
+            node.status = NodeStatus.ENQUEUED
+
+    def _search_loop(self, limits: _Limits) -> TerminationReason:
+        """
+        Search serially until there are enough open nodes, and then their
+        subtrees in parallel. Checkpoints are only written in the serial part,
+        and at the end.
+        """
+        while self.search_strategy.has_next():
+            if len(self.search_strategy) >= self.num_workers * self.subtrees_per_worker:
+                if (reason := self._search_in_parallel(limits)) is not None:
+                    return reason
+                break
+            node = self.search_strategy.next()
+            self.progress_tracker.start_iteration(node)
+            status = self._process_node(node)
+            self.progress_tracker.end_iteration(status)
+            if (
+                self.search_strategy.upper_bound()
+                <= self.solutions.best_solution_value()
+            ):
+                break
+            if (reason := self._after_iteration(limits)) is not None:
+                return reason
+        if self.solutions.best_solution() is None:
+            return TerminationReason.INFEASIBLE
+        return TerminationReason.OPTIMAL
@@ -0,0 +1,126 @@
+"""
+Preprocessing for the branch and bound search.
+
+With a good solution at hand, many variables can already be fixed at the
+root: if forcing an item to the opposite of its value in the root relaxation
+reduces the bound to at most the value of the solution, no better solution
+can use this opposite value. Fixing these items shrinks the search tree, and
+the test gets stronger with every improvement of the best solution.
+
+Computing the bound of the relaxation for every item takes quadratic time
+overall. Most items can already be fixed by the reduced cost bound of the
+linear relaxation, which takes constant time per item: with the ratio r of
+the break item as dual value of the capacity, forcing item j to the opposite
+value reduces the bound by at least |v_j - r*w_j|. The relaxation is only
+solved for the items that this bound cannot fix.
+"""
+
+import typing
+
+import numpy as np
+
+from .compiled import compile_instance
+from .instance import Instance
+from .relaxation import BranchingDecisions, FractionalSolution, RelaxationSolver
+
+
+def greedy_solution(instance: Instance) -> FractionalSolution:
+    """
+    Pack the items in order of their value/weight ratio, skipping those that
+    do not fit anymore. Quickly gives a feasible solution to start with.
+    """
+    compiled = compile_instance(instance)
+    weights = compiled.weights.tolist()
+    remaining_capacity = instance.capacity
+    selection = [0.0] * len(weights)
+    for i in compiled.order.tolist():
+        if weights[i] <= remaining_capacity:
+            selection[i] = 1.0
+            remaining_capacity -= weights[i]
+    return FractionalSolution(instance, selection)
+
+
+class ReducedCostFixing:
+    """
+    Fix variables at the root by testing the bound of the relaxation with the
+    variable forced to the opposite value against the best solution value.
+    """
+
+    def __init__(self, instance: Instance, relaxation: RelaxationSolver) -> None:
+        self.instance = instance
+        self.relaxation = relaxation
+        self.fixings: typing.Dict[int, int] = {}
+
+    def root_decisions(self) -> BranchingDecisions:
+        """
+        The branching decisions of the root with all fixings found so far.
+        """
+        decisions = BranchingDecisions(len(self.instance.items))
+        for item_index, value in self.fixings.items():
+            decisions._fix(item_index, value)
+        return decisions
+
+    def _reduced_cost_bounds(
+        self, root: BranchingDecisions
+    ) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Upper bounds on the linear relaxation of the root with each item
+        forced to 0 and to 1, from the dual solution of the relaxation.
+        """
+        compiled = compile_instance(self.instance)
+        free = np.ones(compiled.num_items, dtype=bool)
+        remaining_capacity, fixed_value = self.instance.capacity, 0
+        for item_index, value in root.fixed_items():
+            free[item_index] = False
+            if value == 1:
+                remaining_capacity -= int(compiled.weights[item_index])
+                fixed_value += int(compiled.values[item_index])
+        order = compiled.order[free[compiled.order]]
+        prefix_weights = np.cumsum(compiled.weights[order])
+        num_fitting = int(np.searchsorted(prefix_weights, remaining_capacity, "right"))
+        bound = fixed_value + float(compiled.values[order[:num_fitting]].sum())
+        ratio = 0.0  # the dual value of the capacity
+        if num_fitting < len(order):
+            ratio = float(compiled.ratios[order[num_fitting]])
+            fitted = int(prefix_weights[num_fitting - 1]) if num_fitting else 0
+            bound += (remaining_capacity - fitted) * ratio
+        reduced_costs = compiled.values - ratio * compiled.weights
+        return (
+            bound - np.maximum(reduced_costs, 0),
+            bound - np.maximum(-reduced_costs, 0),
+        )
+
+    def update(self, incumbent_value: float) -> typing.Dict[int, int]:
+        """
+        Fix all items for which the forced opposite value gives a bound of at
+        most `incumbent_value`. Should be called whenever the incumbent improves.
+        Returns the new fixings as item index to value.
+        """
+        root = self.root_decisions()
+        relaxed_solution = self.relaxation.solve(self.instance, root)
+        if (
+            not relaxed_solution.is_fractionally_feasible()
+            or relaxed_solution.value() <= incumbent_value
+        ):
+            return {}  # there is no better solution, the search will end anyway
+        forced_bounds = self._reduced_cost_bounds(root)
+        new_fixings = {}
+        for item_index, x in enumerate(relaxed_solution.selection):
+            if item_index in self.fixings:
+                continue
+            for forced_value in (0, 1):
+                if x == forced_value:
+                    continue  # does not change the relaxation
+                if forced_bounds[forced_value][item_index] <= incumbent_value:
+                    new_fixings[item_index] = 1 - forced_value
+                    break
+                forced = root.copy()
+                forced._fix(item_index, forced_value)
+                if (
+                    self.relaxation.upper_bound(self.instance, forced)
+                    <= incumbent_value
+                ):
+                    new_fixings[item_index] = 1 - forced_value
+                    break
+        self.fixings.update(new_fixings)
+        return new_fixings
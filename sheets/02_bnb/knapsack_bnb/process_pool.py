@@ -0,0 +1,52 @@
+"""
+The process pools of the parallel search and of the batch solving.
+
+The worker processes are forked if the platform supports it, such that the
+arguments of the workers, e.g., the strategies, do not need to be picklable.
+Otherwise, they need to be. The arguments are passed once per worker when
+the pool is created, and are available in the worker via `worker_args`.
+"""
+
+import multiprocessing
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+# The arguments of the pool in a worker process. Set by _init_worker.
+_worker_state: typing.Dict[str, tuple] = {}
+
+
+def _init_worker(*args) -> None:
+    _worker_state["args"] = args
+
+
+def get_context():
+    """
+    The multiprocessing context of the pools: fork if available, otherwise
+    the default one. Shared values for the workers have to be created with it.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+def create_pool(
+    num_workers: int, worker_args: tuple, context=None
+) -> ProcessPoolExecutor:
+    """
+    Create a pool of `num_workers` processes that get the `worker_args`.
+
+    context: The context from `get_context`, if shared values are passed.
+    """
+    return ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=context or get_context(),
+        initializer=_init_worker,
+        initargs=worker_args,
+    )
+
+
+def worker_args() -> tuple:
+    """
+    The arguments of the pool, in a worker process.
+    """
+    assert "args" in _worker_state, "Worker not initialized."
+    return _worker_state["args"]
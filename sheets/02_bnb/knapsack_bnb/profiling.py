@@ -0,0 +1,155 @@
+"""
+Find out where the time of the branch and bound search goes.
+
+The PhaseProfiler replaces the methods of the components of a search by
+wrappers that measure their time with `perf_counter_ns` and count the calls.
+Only the components of a search with profiling enabled are instrumented, and
+only while it runs. The original methods are restored afterwards, such that
+there is no overhead otherwise, also if a component is reused.
+
+The phases can be nested, e.g., creating a node includes solving its
+relaxation, and the time of "process_node" includes all phases except for
+the queue operations and the tracking of the main loop.
+"""
+
+import contextlib
+import functools
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from .bnb import BnBSearch
+
+
+_NOT_SET = object()
+
+
+class PhaseProfiler:
+    """
+    Measure the time and number of calls of the phases of the search.
+    """
+
+    def __init__(self) -> None:
+        self._total_ns: typing.Dict[str, int] = {}
+        self._calls: typing.Dict[str, int] = {}
+        self._active: typing.Dict[str, int] = {}  # running calls per phase
+        # the replaced attributes as (object, name, previous instance attribute)
+        self._replaced: typing.List[typing.Tuple[typing.Any, str, typing.Any]] = []
+
+    def wrap(
+        self, phase: str, function: typing.Callable, materialize: bool = False
+    ) -> typing.Callable:
+        """
+        Wrap `function` such that its calls are accounted to `phase`. Calls
+        from within the same phase are only accounted once. With
+        `materialize`, the returned iterable is consumed into a list, such
+        that the time of lazy generators is measured as well.
+        """
+        self._total_ns.setdefault(phase, 0)
+        self._calls.setdefault(phase, 0)
+        self._active.setdefault(phase, 0)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if self._active[phase]:
+                return function(*args, **kwargs)
+            self._active[phase] += 1
+            start = time.perf_counter_ns()
+            try:
+                result = function(*args, **kwargs)
+                if materialize:
+                    result = list(result)
+                return result
+            finally:
+                self._total_ns[phase] += time.perf_counter_ns() - start
+                self._calls[phase] += 1
+                self._active[phase] -= 1
+
+        return wrapper
+
+    def instrument(
+        self, obj: typing.Any, method: str, phase: str, materialize: bool = False
+    ) -> None:
+        """
+        Replace the method of `obj` (only this object) by a measured version,
+        until `restore` is called.
+        """
+        self._replaced.append((obj, method, vars(obj).get(method, _NOT_SET)))
+        setattr(obj, method, self.wrap(phase, getattr(obj, method), materialize))
+
+    def restore(self) -> None:
+        """
+        Undo all replacements of `instrument`.
+        """
+        while self._replaced:
+            obj, method, previous = self._replaced.pop()
+            if previous is _NOT_SET:
+                delattr(obj, method)  # the method of the class is visible again
+            else:
+                setattr(obj, method, previous)
+
+    @contextlib.contextmanager
+    def instrumented(self, search: "BnBSearch") -> typing.Iterator[None]:
+        """
+        Instrument the components of the search within the context.
+        """
+        self.instrument_search(search)
+        try:
+            yield
+        finally:
+            self.restore()
+
+    def instrument_search(self, search: "BnBSearch") -> None:
+        """
+        Instrument the components of the search.
+        """
+        self.instrument(search, "_process_node", "process_node")
+        self.instrument(search.relaxation, "solve", "relaxation")
+        self.instrument(search.relaxation, "solve_many", "relaxation")
+        self.instrument(search.heuristics, "search", "heuristics", materialize=True)
+        self.instrument(
+            search.branching_strategy,
+            "make_branching_decisions",
+            "branching",
+            materialize=True,
+        )
+        for method in ("create_root", "create_child", "create_children"):
+            self.instrument(search.node_factory, method, "node_creation")
+        for method in ("enqueue", "next", "upper_bound", "on_incumbent_improved"):
+            self.instrument(search.search_strategy, method, "queue")
+        for method in ("start_iteration", "end_iteration"):
+            self.instrument(search.progress_tracker, method, "tracking")
+        self.instrument(search.node_factory, "on_new_node", "tracking")
+        self.instrument(search.solutions, "add", "solutions")
+        if search.reduced_cost_fixing is not None:
+            self.instrument(search.reduced_cost_fixing, "update", "preprocessing")
+        if search.transposition_table is not None:
+            self.instrument(search.transposition_table, "is_dominated", "transposition")
+
+    def breakdown(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        """
+        The number of calls, and the total and mean time in seconds for
+        every phase that was called.
+        """
+        return {
+            phase: {
+                "calls": self._calls[phase],
+                "total_time": self._total_ns[phase] / 1e9,
+                "mean_time": self._total_ns[phase] / self._calls[phase] / 1e9,
+            }
+            for phase in sorted(
+                self._total_ns, key=lambda p: self._total_ns[p], reverse=True
+            )
+            if self._calls[phase]
+        }
+
+    def report(self) -> str:
+        """
+        The breakdown as a table.
+        """
+        lines = [f"{'Phase':>16} {'Calls':>10} {'Total [s]':>10} {'Mean [us]':>10}"]
+        for phase, stats in self.breakdown().items():
+            lines.append(
+                f"{phase:>16} {stats['calls']:>10} {stats['total_time']:>10.3f} {stats['mean_time'] * 1e6:>10.1f}"
+            )
+        return "\n".join(lines)
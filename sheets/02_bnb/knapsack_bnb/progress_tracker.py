@@ -1,3 +1,9 @@
+import json
+import math
+import time
+import typing
+from pathlib import Path
+
 from .bnb_nodes import BnBNode, NodeStatus
 from .instance import Instance
 from .relaxation import FractionalSolution
@@ -9,6 +15,15 @@ from .visualization import BnBVisualization
 class ProgressTracker:
     """
     Track and report various statistical information related to the branch-and-bound search.
+
+    By default, a line is printed for every processed node. For large searches,
+    the output can be limited to every `log_every` iterations and/or every
+    `log_interval` seconds, or disabled completely with `verbose=False`.
+    Samples of the search metrics are recorded at the printed log points, or
+    every `sample_every` iterations, and can be retrieved with `metrics()` or
+    written to a JSONL file after the search. Their number is bounded by
+    `max_samples`: if it is exceeded, every second sample is dropped and
+    only every second sample point is recorded from then on.
     """
 
     def __init__(
@@ -16,14 +31,53 @@ class ProgressTracker:
         instance: Instance,
         search_strategy: SearchStrategy,
         solutions: SolutionSet,
+        verbose: bool = True,
+        log_every: typing.Optional[int] = 1,
+        log_interval: typing.Optional[float] = None,
+        visualization: typing.Union[bool, BnBVisualization] = True,
+        sample_every: typing.Optional[int] = None,
+        max_samples: int = 10_000,
     ) -> None:
+        """
+        verbose: Print the progress. Metrics are also collected without printing.
+        log_every: Log the progress every `log_every` iterations. None to disable.
+        log_interval: Log the progress if the last log point is at least
+            `log_interval` seconds ago. None to disable.
+        sample_every: Record a sample every `sample_every` iterations. By
+            default, samples are recorded at the log points if verbose, and
+            otherwise only every `log_interval` seconds (if given).
+        max_samples: The maximal number of samples kept.
+        visualization: The visualization to record the search tree in. True
+            for a default visualization, False to not record anything.
+        """
         self.search_strategy = search_strategy
         self.solutions = solutions
+        self.verbose = verbose
+        self.log_every = log_every
+        self.log_interval = log_interval
+        if max_samples < 1:
+            msg = "At least one sample has to be kept."
+            raise ValueError(msg)
+        self.sample_every = sample_every
+        self.max_samples = max_samples
         self._current_node = None
         self._heuristic_solutions = []
         self.num_nodes = 0
         self.num_iterations = 0
-        self._vis = BnBVisualization(instance)
+        self.num_pruned_nodes = 0
+        self.num_fixed_variables = 0
+        if visualization is True:
+            visualization = BnBVisualization(instance)
+        self._vis = visualization or None
+        # timestamps of the phases of the search and samples at the log points
+        self._created_at = time.perf_counter()
+        self._search_started_at: typing.Optional[float] = None
+        self._search_ended_at: typing.Optional[float] = None
+        self._finished_at: typing.Optional[float] = None
+        self._last_log_at = self._created_at
+        self._samples: typing.List[typing.Dict[str, typing.Any]] = []
+        self._num_sample_points = 0
+        self._sample_stride = 1  # doubled whenever the samples are thinned out
 
     def upper_bound(self) -> float:
         """
@@ -42,12 +96,43 @@ class ProgressTracker:
         """
         return self.solutions.best_solution_value()
 
+    def gap(self) -> float:
+        """
+        Get the relative gap between the upper and the lower bound. It is
+        inf if no solution is known yet.
+        """
+        upper_bound = self.upper_bound()
+        lower_bound = self.lower_bound()
+        if upper_bound <= lower_bound:
+            return 0.0
+        if math.isinf(lower_bound) or math.isinf(upper_bound):
+            return float("inf")
+        return (upper_bound - lower_bound) / max(abs(upper_bound), 1e-9)
+
+    def _elapsed(self) -> float:
+        """
+        Seconds since the start of the search.
+        """
+        if self._search_started_at is None:
+            return 0.0
+        end = self._search_ended_at or time.perf_counter()
+        return end - self._search_started_at
+
     def on_new_node_in_tree(self, node: BnBNode) -> None:
         """
         Report the creation of a new node in the search tree.
         """
         self.num_nodes += 1
-        self._vis.on_new_node_in_tree(node)
+        if self._vis is not None:
+            self._vis.on_new_node_in_tree(node)
+
+    def on_search_resumed(self, open_nodes: typing.List[BnBNode]) -> None:
+        """
+        Report the open nodes restored from a checkpoint. They are not new,
+        but the visualization needs them to record their subtrees.
+        """
+        if self._vis is not None:
+            self._vis.on_search_resumed(open_nodes)
 
     def on_heuristic_solution(
         self, node: BnBNode, solution: FractionalSolution
@@ -58,11 +143,77 @@ class ProgressTracker:
         if solution.value() < self.solutions.best_solution_value():
             return
         self._heuristic_solutions.append(solution)
-        print(
-            f"\tNew solution found by heuristics: {solution} of value {solution.value()}"
-        )
+        if self.verbose:
+            print(
+                f"\tNew solution found by heuristics: {solution} of value {solution.value()}"
+            )
+
+    def on_nodes_pruned(self, num_pruned: int) -> None:
+        """
+        Report the removal of open nodes from the queue after the incumbent improved.
+        """
+        if num_pruned == 0:
+            return
+        self.num_pruned_nodes += num_pruned
+        if self.verbose:
+            print(f"\tPruned {num_pruned} open nodes with the new solution.")
+
+    def on_dominated_nodes(self, num_dominated: int) -> None:
+        """
+        Report new nodes that were not enqueued because an equivalent node
+        with a better or equal fixed value was seen before.
+        """
+        if num_dominated == 0:
+            return
+        self.num_pruned_nodes += num_dominated
+        if self.verbose:
+            print(f"\tPruned {num_dominated} new nodes dominated by equivalent nodes.")
+
+    def on_variables_fixed(self, num_fixed: int) -> None:
+        """
+        Report the fixing of variables for the whole search by preprocessing.
+        """
+        if num_fixed == 0:
+            return
+        self.num_fixed_variables += num_fixed
+        if self.verbose:
+            print(f"\tFixed {num_fixed} variables with the new solution.")
+
+    def on_subtree_searched(
+        self, node: BnBNode, num_nodes: int, num_iterations: int
+    ) -> None:
+        """
+        Report the search of the subtree below `node` by a parallel worker.
+        `num_nodes` are the nodes created below `node`, and `num_iterations`
+        the processed nodes, including `node` itself.
+        """
+        self.num_nodes += num_nodes
+        self.num_iterations += num_iterations
+        if self.verbose:
+            print(
+                f"\tSubtree of node {node.node_id} searched with {num_iterations} iterations and {num_nodes} created nodes."
+            )
+
+    def on_checkpoint(self, path: typing.Union[str, Path]) -> None:
+        """
+        Report that a checkpoint of the search has been written.
+        """
+        if self.verbose:
+            print(f"\tCheckpoint written to {path}.")
+
+    def on_profile(self, report: str) -> None:
+        """
+        Report the time spent in the phases of the search.
+        """
+        if self.verbose:
+            print()
+            print(report)
 
     def start_search(self):
+        self._search_started_at = time.perf_counter()
+        self._last_log_at = self._search_started_at
+        if not self.verbose:
+            return
         print(
             "Nodes: The number of nodes processed so far of the number of nodes created."
         )
@@ -78,46 +229,157 @@ class ProgressTracker:
         self._current_node = node
         self.num_iterations += 1
 
+    def _is_log_point(self) -> bool:
+        if (
+            self.verbose
+            and self.log_every
+            and self.num_iterations % self.log_every == 0
+        ):
+            return True
+        return (
+            self.log_interval is not None
+            and time.perf_counter() - self._last_log_at >= self.log_interval
+        )
+
+    def _is_sample_point(self, is_log_point: bool) -> bool:
+        if self.sample_every is not None:
+            is_sample_point = self.num_iterations % self.sample_every == 0
+        else:
+            is_sample_point = is_log_point
+        if not is_sample_point:
+            return False
+        self._num_sample_points += 1
+        return self._num_sample_points % self._sample_stride == 0
+
+    def _record_sample(self, upper_bound: float, lower_bound: float) -> None:
+        if len(self._samples) >= self.max_samples:
+            # Keep the samples at the multiples of the doubled stride.
+            self._samples = self._samples[1::2]
+            self._sample_stride *= 2
+        elapsed = self._elapsed()
+        self._samples.append(
+            {
+                "time": elapsed,
+                "iterations": self.num_iterations,
+                "nodes": self.num_nodes,
+                "queue_size": len(self.search_strategy),
+                "upper_bound": upper_bound,
+                "lower_bound": lower_bound,
+                "gap": self.gap(),
+                "nodes_per_second": self.num_iterations / elapsed if elapsed else 0.0,
+            }
+        )
+
     def end_iteration(self, status: NodeStatus):
-        # self.vis.on_node_processed(node, lb=self.progress_tracker.lower_bound(), ub=self.progress_tracker.upper_bound(), best_solution= self.solutions.best_solution())
         """
         Print the progress information of the search process, which
         includes the explored nodes number,the created nodes number,
         the depth and status of the current node,
         the upper bound, and the lower bound.
+        Only done at the log points, where also a sample of the metrics is recorded.
         """
         assert self._current_node is not None, "No current node."
-        num_nodes = self.num_nodes
-        num_nodes_in_queue = len(self.search_strategy)
-        num_nodes_explored = num_nodes - num_nodes_in_queue
-        last_node_value = (
-            round(self._current_node.relaxed_solution.value(), 3)
-            if self._current_node
-            else "-"
-        )
-        last_node_depth = self._current_node.depth if self._current_node else "-"
-        last_node_status = status.value
+        is_log_point = self._is_log_point()
+        is_sample_point = self._is_sample_point(is_log_point)
+        if not is_log_point and not is_sample_point and self._vis is None:
+            self._current_node = None
+            self._heuristic_solutions = []
+            return
         upper_bound = round(self.upper_bound(), 3)
         lower_bound = round(self.lower_bound(), 3)
-        print(
-            f"{f'{num_nodes_explored}/{num_nodes}':>10} {last_node_depth:>10} {last_node_status:>10} {last_node_value:>10} {upper_bound:>10} {lower_bound:>10}"
-        )
-        self._vis.on_node_processed(
-            self._current_node,
-            lb=lower_bound,
-            ub=upper_bound,
-            best_solution=self.solutions.best_solution(),
-            heuristic_solutions=self._heuristic_solutions,
-        )
+        if is_sample_point:
+            self._record_sample(upper_bound, lower_bound)
+        if is_log_point:
+            self._last_log_at = time.perf_counter()
+            if self.verbose:
+                num_nodes = self.num_nodes
+                num_nodes_in_queue = len(self.search_strategy)
+                num_nodes_explored = num_nodes - num_nodes_in_queue
+                last_node_value = round(self._current_node.relaxed_solution.value(), 3)
+                last_node_depth = self._current_node.depth
+                last_node_status = status.value
+                print(
+                    f"{f'{num_nodes_explored}/{num_nodes}':>10} {last_node_depth:>10} {last_node_status:>10} {last_node_value:>10} {upper_bound:>10} {lower_bound:>10}"
+                )
+        if self._vis is not None:
+            self._vis.on_node_processed(
+                self._current_node,
+                lb=lower_bound,
+                ub=upper_bound,
+                best_solution=self.solutions.best_solution(),
+                heuristic_solutions=self._heuristic_solutions,
+            )
         self._current_node = None
         self._heuristic_solutions = []
 
-    def end_search(self):
-        print()
-        print(
-            f"Search finished in {self.num_iterations} iterations and {self.num_nodes} created nodes."
-        )
-        print(
-            f"The optimal solution is {self.solutions.best_solution()} with value {self.solutions.best_solution_value()}."
-        )
-        self._vis.visualize()
+    def end_search(self, optimal: bool = True):
+        """
+        optimal: If the search was completed. Otherwise, it was stopped by a
+            limit and the gap is reported.
+        """
+        self._search_ended_at = time.perf_counter()
+        self._record_sample(self.upper_bound(), self.lower_bound())
+        if self.verbose:
+            print()
+            print(
+                f"Search finished in {self.num_iterations} iterations and {self.num_nodes} created nodes."
+            )
+            if optimal:
+                print(
+                    f"The optimal solution is {self.solutions.best_solution()} with value {self.solutions.best_solution_value()}."
+                )
+            else:
+                print(
+                    f"The search was stopped early. The best solution is {self.solutions.best_solution()} with value {self.solutions.best_solution_value()}, the upper bound is {self.upper_bound()} (gap {self.gap():.2%})."
+                )
+        if self._vis is not None:
+            self._vis.visualize()
+        self._finished_at = time.perf_counter()
+
+    def close(self) -> None:
+        """
+        Release the resources of the visualization if the search ends without
+        `end_search`, e.g., because of an exception.
+        """
+        if self._vis is not None:
+            self._vis.close()
+
+    def metrics(self) -> typing.Dict[str, typing.Any]:
+        """
+        Get the metrics of the search as a dictionary. Contains the final
+        statistics, the time spent in each phase (setup including the root node,
+        search, and visualization), and the samples recorded at the log points.
+        """
+        elapsed = self._elapsed()
+        phase_times = {}
+        if self._search_started_at is not None:
+            phase_times["setup"] = self._search_started_at - self._created_at
+            phase_times["search"] = elapsed
+        if self._search_ended_at is not None and self._finished_at is not None:
+            phase_times["visualization"] = self._finished_at - self._search_ended_at
+        return {
+            "num_nodes": self.num_nodes,
+            "num_iterations": self.num_iterations,
+            "num_pruned_nodes": self.num_pruned_nodes,
+            "num_fixed_variables": self.num_fixed_variables,
+            "queue_size": len(self.search_strategy),
+            "upper_bound": self.upper_bound(),
+            "lower_bound": self.lower_bound(),
+            "gap": self.gap(),
+            "time": elapsed,
+            "nodes_per_second": self.num_iterations / elapsed if elapsed else 0.0,
+            "phase_times": phase_times,
+            "samples": list(self._samples),
+        }
+
+    def write_metrics(self, path: typing.Union[str, Path]) -> None:
+        """
+        Write the metrics to a JSONL file: one line for each sample, followed
+        by a line with the final statistics.
+        """
+        metrics = self.metrics()
+        samples = metrics.pop("samples")
+        with Path(path).open("w") as file:
+            for sample in samples:
+                file.write(json.dumps({"type": "sample", **sample}) + "\n")
+            file.write(json.dumps({"type": "summary", **metrics}) + "\n")
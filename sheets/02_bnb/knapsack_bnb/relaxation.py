@@ -1,18 +1,55 @@
 import abc
+import bisect
+import itertools
 import typing
 from typing import List, Optional
 
+import numpy as np
+
+from .compiled import compile_instance
 from .instance import Instance
 
 
+class _Fixing:
+    """
+    A single fixed variable together with a link to the fixings made before it.
+    The fixings form a tree that is shared by all branching decisions derived
+    from the same parent, and it is never modified after creation.
+    """
+
+    __slots__ = ("fixed_weight", "item_index", "num_fixed", "parent", "value")
+
+    def __init__(
+        self, parent: Optional["_Fixing"], item_index: int, value: int, weight: int = 0
+    ) -> None:
+        self.parent = parent
+        self.item_index = item_index
+        self.value = value
+        self.num_fixed = 1 if parent is None else parent.num_fixed + 1
+        # total weight of the items fixed to 1, including this one
+        self.fixed_weight = (0 if parent is None else parent.fixed_weight) + (
+            weight if value == 1 else 0
+        )
+
+
 class BranchingDecisions:
     """
     Represents the branching decisions made during the branch and bound algorithm.
 
     This class provides methods to initialize, access, fix, and split the branching decisions.
 
+    Internally, only the most recent fixing is stored, which links to the fixings
+    of the parent. The full vector of assignments is only materialized when
+    iterating. Thus, copying and splitting take O(1) time and memory, no matter
+    how many variables there are. Looking up a single index, and thus checking
+    that an item is free in `fix`, takes time linear in the number of fixed
+    variables. If the weights of the items are given, the total weight of the
+    items fixed to 1 is kept as well, which allows to propagate the capacity
+    constraint before solving a relaxation.
+
     Args:
         length: Number of variables.
+        weights: The weights of the items, optional. Shared, not copied.
 
     Returns:
         None
@@ -23,13 +60,29 @@ class BranchingDecisions:
         length(self): Get the length of the branching decisions. Equals the number of variables and is constant.
         __iter__(self): Iterate over the branching decisions.
         split_on(self, index): Split the branching decisions into two based on the specified index.
+        fixed_weight(self): The total weight of the items fixed to 1.
+        propagate(self, capacity): Fix the items that do not fit anymore to 0.
     """
 
-    def __init__(self, length) -> None:
-        self._assignments: List[Optional[int]] = [None] * length
+    __slots__ = ("_last", "_length", "_weights")
+
+    def __init__(self, length, weights: Optional[typing.Sequence[int]] = None) -> None:
+        if weights is not None and len(weights) != length:
+            msg = "Weights must have the same length as the decisions."
+            raise ValueError(msg)
+        self._length: int = length
+        self._weights = weights
+        self._last: Optional[_Fixing] = None
 
     def __getitem__(self, item_index: int) -> typing.Optional[int]:
-        return self._assignments[item_index]
+        if not -self._length <= item_index < self._length:
+            msg = "Item index out of range."
+            raise IndexError(msg)
+        item_index %= self._length
+        for i, x in self.fixed_items():
+            if i == item_index:
+                return x
+        return None
 
     def fix(self, item_index: int, value: int) -> None:
         """
@@ -37,8 +90,18 @@ class BranchingDecisions:
         Only do this if you are sure that you do not prohibit the optimal solution.
         """
         assert value in {0, 1}, "Value must be 0 or 1."
-        assert self._assignments[item_index] is None, "Item is already fixed."
-        self._assignments[item_index] = value
+        assert self[item_index] is None, "Item is already fixed."
+        self._fix(item_index % self._length, value)
+
+    def _fix(self, item_index: int, value: int) -> None:
+        """
+        Fix an item without checking that it is free, which would take time
+        linear in the number of fixed items. For the internal callers that
+        already know that the item is free, e.g., by checking `fixed_items`
+        once for many items. Fixing an item twice corrupts the decisions.
+        """
+        weight = self._weights[item_index] if self._weights is not None else 0
+        self._last = _Fixing(self._last, item_index, value, weight)
 
     def copy(self) -> "BranchingDecisions":
         """Create a copy of the branching decisions.
@@ -50,15 +113,91 @@ class BranchingDecisions:
             >>> decisions = BranchingDecisions(5)
             >>> copy = decisions.copy()
         """
-        copy = BranchingDecisions(len(self))
-        copy._assignments = self._assignments.copy()
+        copy = BranchingDecisions(self._length, self._weights)
+        copy._last = self._last
         return copy
 
+    def __reduce__(self):
+        # Pickle the fixings as a flat list. The default pickles the chain
+        # recursively, which exceeds the recursion limit for long chains, e.g.,
+        # when sending nodes to the workers of the parallel search.
+        fixings = list(self.fixed_items())
+        fixings.reverse()
+        return (_restore_branching_decisions, (self._length, self._weights, fixings))
+
+    @property
+    def weights(self) -> Optional[typing.Sequence[int]]:
+        """
+        The weights of the items, if given.
+        """
+        return self._weights
+
     def __len__(self) -> int:
-        return len(self._assignments)
+        return self._length
 
     def __iter__(self):
-        return iter(self._assignments)
+        assignments: List[Optional[int]] = [None] * self._length
+        for i, x in self.fixed_items():
+            assignments[i] = x
+        return iter(assignments)
+
+    def fixed_items(self) -> typing.Iterator[typing.Tuple[int, int]]:
+        """
+        Iterate over the (item_index, value) pairs of all fixed items, most
+        recent fixing first.
+        Its cost only depends on the number of fixed items, not on the number
+        of variables.
+        """
+        fixing = self._last
+        while fixing is not None:
+            yield fixing.item_index, fixing.value
+            fixing = fixing.parent
+
+    def num_fixed(self) -> int:
+        """
+        Number of fixed variables.
+        """
+        return 0 if self._last is None else self._last.num_fixed
+
+    def fixed_weight(self) -> int:
+        """
+        The total weight of the items fixed to 1, in O(1). Requires the weights.
+        """
+        if self._weights is None:
+            msg = "The branching decisions have been created without weights."
+            raise ValueError(msg)
+        return 0 if self._last is None else self._last.fixed_weight
+
+    def propagate(
+        self, capacity: int, order: Optional[typing.Sequence[int]] = None
+    ) -> bool:
+        """
+        Fix all free items to 0 that are heavier than the remaining capacity,
+        as they cannot be packed in any solution with these decisions.
+        Returns False, without fixing anything, if the items fixed to 1
+        already exceed the capacity. Requires the weights.
+
+        capacity: The capacity of the knapsack.
+        order: The item indices sorted by decreasing weight, such that only
+            the items that do not fit are visited. Sorted on every call if
+            not given.
+        """
+        remaining_capacity = capacity - self.fixed_weight()
+        if remaining_capacity < 0:
+            return False
+        weights = self._weights
+        assert weights is not None, "Checked by fixed_weight."
+        if order is None:
+            order = sorted(range(self._length), key=weights.__getitem__, reverse=True)
+        fixed: Optional[typing.Set[int]] = None
+        for i in order:
+            if weights[i] <= remaining_capacity:
+                break
+            if fixed is None:
+                fixed = {j for j, _ in self.fixed_items()}
+            if i not in fixed:
+                self._fix(i, 0)
+        return True
 
     def split_on(
         self, item_index: int
@@ -80,21 +219,50 @@ class BranchingDecisions:
             >>> left, right = decisions.split_on(2)
         """
 
-        left = BranchingDecisions(len(self))
-        right = BranchingDecisions(len(self))
-        left._assignments = self._assignments.copy()
-        right._assignments = self._assignments.copy()
-        left.fix(item_index, 0)
-        right.fix(item_index, 1)
+        left = self.copy()
+        right = self.copy()
+        # the branching strategies only split on free items
+        left._fix(item_index, 0)
+        right._fix(item_index, 1)
         return left, right
 
 
+def _restore_branching_decisions(
+    length: int,
+    weights: Optional[typing.Sequence[int]],
+    fixings: typing.List[typing.Tuple[int, int]],
+) -> BranchingDecisions:
+    branching_decisions = BranchingDecisions(length, weights)
+    for item_index, value in fixings:
+        branching_decisions._fix(item_index, value)
+    return branching_decisions
+
+
 class FractionalSolution:
     """
     Represents a fractional solution to the knapsack problem.
+
+    Fractional solutions are immutable, such that they can be shared between
+    the components of the search without defensive copies. Value, weight,
+    feasibility, and integrality are computed on first use and then cached.
+
+    As every open node keeps the solution of its relaxation, the selection is
+    stored compactly: the fully taken items as a bitmask of n/8 bytes, and
+    the few other nonzero entries, e.g., the break item of a relaxation,
+    explicitly. The tuple of `selection` is rebuilt on every access.
     """
 
-    def __init__(self, instance: Instance, selection: typing.List[float]):
+    __slots__ = (
+        "_feasible",
+        "_instance",
+        "_integral",
+        "_others",
+        "_taken",
+        "_value",
+        "_weight",
+    )
+
+    def __init__(self, instance: Instance, selection: typing.Sequence[float]):
         """
         instance: knapsack problem instance
         selection: list of predefined item selections, where 0 means not taken
@@ -103,40 +271,96 @@ class FractionalSolution:
         if len(selection) != len(instance.items):
             msg = "Selection must have same length as items."
             raise ValueError(msg)
-        self.instance = instance
-        self.selection = selection
+        self._instance = instance
+        array = np.asarray(selection, dtype=np.float64).reshape(len(selection))
+        taken = array == 1
+        self._taken: bytes = np.packbits(taken).tobytes()
+        others = np.flatnonzero(~taken & (array != 0))
+        # (index, fraction) of the entries that are neither 0 nor 1
+        self._others: typing.Tuple[typing.Tuple[int, float], ...] = (
+            tuple(zip(others.tolist(), array[others].tolist())) if others.size else ()
+        )
+        self._value: Optional[float] = None
+        self._weight: Optional[float] = None
+        self._feasible: Optional[bool] = None
+        self._integral: Optional[bool] = None
+
+    @property
+    def instance(self) -> Instance:
+        """
+        The knapsack problem instance of this solution.
+        """
+        return self._instance
+
+    def as_array(self) -> np.ndarray:
+        """
+        The selection as a new float array, without building the tuple.
+        """
+        array = np.unpackbits(
+            np.frombuffer(self._taken, dtype=np.uint8), count=len(self._instance.items)
+        ).astype(np.float64)
+        for i, x in self._others:
+            array[i] = x
+        return array
+
+    @property
+    def selection(self) -> typing.Tuple[float, ...]:
+        """
+        The (read-only) fraction of each item that is taken.
+        """
+        return tuple(self.as_array().tolist())
+
+    def fraction(self, item_index: int) -> float:
+        """
+        The fraction of a single item that is taken.
+        """
+        item_index %= len(self._instance.items)
+        for i, x in self._others:
+            if i == item_index:
+                return x
+        return float(self._taken[item_index // 8] >> (7 - item_index % 8) & 1)
+
+    def fractional_items(self) -> typing.List[int]:
+        """
+        The indices of the items that are only partially taken, in order.
+        """
+        return [i for i, x in self._others if not x.is_integer()]
 
     def value(self) -> float:
         """
         Total value of packed items in fractional solution.
         """
-        return sum(
-            item.value * taken
-            for item, taken in zip(self.instance.items, self.selection)
-        )
+        if self._value is None:
+            values = compile_instance(self._instance).values
+            self._value = float(values @ self.as_array())
+        return self._value
 
     def weight(self) -> float:
         """
         Total weight of items of fractional solution.
         """
-        return sum(
-            item.weight * taken
-            for item, taken in zip(self.instance.items, self.selection)
-        )
+        if self._weight is None:
+            weights = compile_instance(self._instance).weights
+            self._weight = float(weights @ self.as_array())
+        return self._weight
 
     def is_fractionally_feasible(self) -> bool:
         """
         Check if total weight of fractional solution doesn't exceed knapsack capacity.
         """
-        return self.weight() <= self.instance.capacity and all(
-            0 <= taken <= 1 for taken in self.selection
-        )
+        if self._feasible is None:
+            self._feasible = self.weight() <= self._instance.capacity and all(
+                0 <= x <= 1 for _, x in self._others
+            )
+        return self._feasible
 
     def is_integral(self) -> bool:
         """
         Check if all item selections of fractional solution are integers.
         """
-        return all(taken == int(taken) for taken in self.selection)
+        if self._integral is None:
+            self._integral = all(x.is_integer() for _, x in self._others)
+        return self._integral
 
     def __str__(self) -> str:
         return (
@@ -145,8 +369,12 @@ class FractionalSolution:
             + "]"
         )
 
-    def copy(self):
-        return FractionalSolution(self.instance, self.selection.copy())
+    def copy(self) -> "FractionalSolution":
+        """
+        Fractional solutions are immutable, so they can be shared instead
+        of copied. Only kept for compatibility.
+        """
+        return self
 
 
 class RelaxationSolver(abc.ABC):
@@ -162,6 +390,26 @@ class RelaxationSolver(abc.ABC):
             1 means fully taken, and None means not fixed
         """
 
+    def solve_many(
+        self, instance: Instance, fixations: typing.Sequence[BranchingDecisions]
+    ) -> List[FractionalSolution]:
+        """
+        Solve the fractional knapsack problem for multiple fixations at once.
+        Solvers can override this to amortize the overhead over all fixations.
+        """
+        return [self.solve(instance, fixation) for fixation in fixations]
+
+    def upper_bound(self, instance: Instance, fixation: BranchingDecisions) -> float:
+        """
+        The value of the relaxation for the given fixations, or -inf if it is
+        infeasible. Solvers can override this to compute the bound without
+        building a complete FractionalSolution.
+        """
+        solution = self.solve(instance, fixation)
+        if not solution.is_fractionally_feasible():
+            return float("-inf")
+        return solution.value()
+
 
 class BasicRelaxationSolver(RelaxationSolver):
     """
@@ -203,3 +451,286 @@ class BasicRelaxationSolver(RelaxationSolver):
         return FractionalSolution(instance, selection)
 
 
+class DantzigRelaxationSolver(RelaxationSolver):
+    """
+    Solve the fractional knapsack problem like the BasicRelaxationSolver, but
+    without sorting the items for every node.
+
+    The items are sorted by value/weight only once per instance, and the prefix
+    sums of weights and values in this order are kept. For a node, only the
+    fixed items have to be corrected for, and the break item is found by a
+    binary search on the prefix sums. Computing the bound thus takes
+    O(log n + k log k) for k fixed items instead of O(n log n). Only writing
+    the selection vector of the FractionalSolution still depends on n.
+    """
+
+    def __init__(self) -> None:
+        self._instance: Optional[Instance] = None
+        self._order: List[int] = []  # item indices sorted by value/weight
+        self._rank: List[int] = []  # position of each item in the order
+        self._prefix_weights: List[int] = []
+        self._prefix_values: List[int] = []
+        self._weights: List[int] = []
+        self._values: List[int] = []
+
+    def _prepare(self, instance: Instance) -> None:
+        """
+        Take the order by value/weight and the prefix sums from the compiled
+        instance, as lists for the scalar accesses. Does nothing if the
+        instance has already been prepared.
+        """
+        if instance is self._instance:
+            return
+        # Same (stable) order as used by the BasicRelaxationSolver.
+        compiled = compile_instance(instance)
+        self._order = compiled.order.tolist()
+        self._rank = compiled.rank.tolist()
+        self._prefix_weights = compiled.prefix_weights.tolist()
+        self._prefix_values = compiled.prefix_values.tolist()
+        self._weights = compiled.weights.tolist()
+        self._values = compiled.values.tolist()
+        self._instance = instance
+
+    def _find_break(
+        self, instance: Instance, fixation: BranchingDecisions
+    ) -> typing.Tuple[List[typing.Tuple[int, int]], int, float]:
+        """
+        Determine the fractional solution in the presorted order.
+
+        Returns the sorted (position, value) pairs of the fixed items, the position of the
+        break item (len(items) if all free items fit), and the remaining
+        capacity for the break item. All free items before the break position
+        are fully taken, all free items after it are not taken.
+        """
+        self._prepare(instance)
+        weights = self._weights
+        remaining_capacity = instance.capacity
+        fixed = []
+        for i, x in fixation.fixed_items():
+            fixed.append((self._rank[i], x))
+            if x == 1:
+                remaining_capacity -= weights[i]
+        fixed.sort()
+        prefix_weights = self._prefix_weights
+        # The free items form the segments between the fixed positions. Skip
+        # over the segments that fit completely and binary search the break
+        # item in the first segment that does not.
+        start = 0
+        for end in itertools.chain(
+            (position for position, _ in fixed), (len(weights),)
+        ):
+            segment_weight = prefix_weights[end] - prefix_weights[start]
+            if start < end and segment_weight > remaining_capacity:
+                # The last prefix that still fits. If the fixed items already
+                # exceed the capacity, the first free item is the break item.
+                position = max(
+                    start,
+                    bisect.bisect_right(
+                        prefix_weights,
+                        remaining_capacity + prefix_weights[start],
+                        start,
+                        end + 1,
+                    )
+                    - 1,
+                )
+                remaining_capacity -= prefix_weights[position] - prefix_weights[start]
+                return fixed, position, remaining_capacity
+            remaining_capacity -= segment_weight
+            start = end + 1
+        return fixed, len(weights), remaining_capacity
+
+    def solve(
+        self, instance: Instance, fixation: BranchingDecisions
+    ) -> FractionalSolution:
+        """
+        Solve the fractional knapsack problem from the given instance and deduced
+          fixations.
+        instance: knapsack problem instance
+        fixation: list of predefined item selections, where 0 means not taken,
+            1 means fully taken, and None means not fixed
+        """
+        fixed, break_position, remaining_capacity = self._find_break(instance, fixation)
+        selection = [0.0] * len(instance.items)
+        for i in self._order[:break_position]:
+            selection[i] = 1.0
+        for position, x in fixed:
+            selection[self._order[position]] = float(x)
+        if break_position < len(instance.items):
+            i = self._order[break_position]
+            selection[i] = remaining_capacity / self._weights[i]
+        return FractionalSolution(instance, selection)
+
+    def upper_bound(self, instance: Instance, fixation: BranchingDecisions) -> float:
+        """
+        The value of the relaxation for the given fixations, or -inf if it is
+        infeasible. Only uses the prefix sums, i.e., does not touch the free items.
+        """
+        fixed, break_position, remaining_capacity = self._find_break(instance, fixation)
+        values = self._values
+        if remaining_capacity < 0:
+            return float("-inf")
+        value = self._prefix_values[break_position]
+        for position, x in fixed:
+            i = self._order[position]
+            if position < break_position:
+                value -= values[i]
+            if x == 1:
+                value += values[i]
+        if break_position < len(values):
+            i = self._order[break_position]
+            value += remaining_capacity * values[i] / self._weights[i]
+        return value
+
+
+class MartelloTothRelaxationSolver(RelaxationSolver):
+    """
+    A stronger bound than the fractional knapsack in the spirit of the
+    Martello-Toth bound U2: the break item can only be packed completely or
+    not at all, so the bound is the maximum of the fractional knapsacks with
+    the break item fixed to 0 and to 1. With a larger `depth`, this branching
+    is repeated on the break items of these subproblems, which takes up to
+    2^depth solves of the fractional knapsack.
+
+    The returned solution is the fractional solution of the subproblem with
+    the best bound. It is feasible for the node and at most as good as the
+    fractional knapsack of the node, so it can be used the same way. If it is
+    integral, it is an optimal solution of the node.
+    """
+
+    def __init__(
+        self, depth: int = 1, relaxation: Optional[RelaxationSolver] = None
+    ) -> None:
+        """
+        depth: How often to branch on the break item within the bound.
+        relaxation: The solver for the fractional knapsacks. Defaults to
+            DantzigRelaxationSolver.
+        """
+        if depth < 0:
+            msg = "The depth must be non-negative."
+            raise ValueError(msg)
+        self.depth = depth
+        self.relaxation = relaxation or DantzigRelaxationSolver()
+
+    def _best_subproblem(
+        self,
+        instance: Instance,
+        fixation: BranchingDecisions,
+        solution: FractionalSolution,
+        depth: int,
+    ) -> FractionalSolution:
+        if (
+            depth == 0
+            or not solution.is_fractionally_feasible()
+            or solution.is_integral()
+        ):
+            return solution
+        break_item = solution.fractional_items()[0]
+        without_item, with_item = fixation.split_on(break_item)
+        if depth == 1:
+            # only the solution of the better subproblem is needed
+            best = max(
+                (without_item, with_item),
+                key=lambda f: self.relaxation.upper_bound(instance, f),
+            )
+            return self.relaxation.solve(instance, best)
+        best_solution = solution
+        for subproblem in (without_item, with_item):
+            subproblem_solution = self._best_subproblem(
+                instance,
+                subproblem,
+                self.relaxation.solve(instance, subproblem),
+                depth - 1,
+            )
+            if subproblem_solution.is_fractionally_feasible() and (
+                best_solution is solution
+                or subproblem_solution.value() > best_solution.value()
+            ):
+                best_solution = subproblem_solution
+        return best_solution
+
+    def solve(
+        self, instance: Instance, fixation: BranchingDecisions
+    ) -> FractionalSolution:
+        solution = self.relaxation.solve(instance, fixation)
+        return self._best_subproblem(instance, fixation, solution, self.depth)
+
+
+class VectorizedRelaxationSolver(RelaxationSolver):
+    """
+    Solve the fractional knapsack problem for many branching decisions at once
+    using NumPy.
+
+    The branching decisions are stacked into a matrix in the presorted item
+    order, and the break items of all rows are computed with array operations.
+    This amortizes the Python overhead on instances with many items. The
+    solutions are the same as the ones of the BasicRelaxationSolver.
+    """
+
+    def __init__(self) -> None:
+        self._instance: Optional[Instance] = None
+        self._order = np.empty(0, dtype=np.int64)
+        self._rank = np.empty(0, dtype=np.int64)
+        self._weights = np.empty(0, dtype=np.int64)  # in presorted order
+
+    def _prepare(self, instance: Instance) -> None:
+        if instance is self._instance:
+            return
+        # Same (stable) order as used by the BasicRelaxationSolver.
+        compiled = compile_instance(instance)
+        self._order = compiled.order
+        self._rank = compiled.rank
+        self._weights = compiled.weights[compiled.order]
+        self._instance = instance
+
+    def solve(
+        self, instance: Instance, fixation: BranchingDecisions
+    ) -> FractionalSolution:
+        """
+        Solve the fractional knapsack problem from the given instance and deduced
+          fixations.
+        instance: knapsack problem instance
+        fixation: list of predefined item selections, where 0 means not taken,
+            1 means fully taken, and None means not fixed
+        """
+        return self.solve_many(instance, [fixation])[0]
+
+    def solve_many(
+        self, instance: Instance, fixations: typing.Sequence[BranchingDecisions]
+    ) -> List[FractionalSolution]:
+        """
+        Solve the fractional knapsack problem for multiple fixations at once.
+        """
+        if not fixations:
+            return []
+        self._prepare(instance)
+        n = len(instance.items)
+        # -1: free, 0: not taken, 1: taken; columns in presorted order
+        decisions = np.full((len(fixations), n), -1, dtype=np.int8)
+        rows, columns, values = [], [], []
+        for row, fixation in enumerate(fixations):
+            for i, x in fixation.fixed_items():
+                rows.append(row)
+                columns.append(i)
+                values.append(x)
+        decisions[rows, self._rank[columns]] = values
+        free = decisions == -1
+        taken = decisions == 1
+        remaining_capacity = instance.capacity - taken @ self._weights
+        cumulative_weights = np.cumsum(np.where(free, self._weights, 0), axis=1)
+        fits = cumulative_weights <= remaining_capacity[:, None]
+        selection = (taken | (free & fits)).astype(np.float64)
+        # The break item is the first free item that does not fit anymore.
+        beyond = free & ~fits
+        break_rows = np.flatnonzero(beyond.any(axis=1))
+        if break_rows.size:  # argmax fails on empty rows, e.g., without items
+            break_positions = beyond[break_rows].argmax(axis=1)
+            break_weights = self._weights[break_positions]
+            selection[break_rows, break_positions] = (
+                remaining_capacity[break_rows]
+                - cumulative_weights[break_rows, break_positions]
+                + break_weights
+            ) / break_weights
+        # back to the original item order
+        unsorted = np.empty_like(selection)
+        unsorted[:, self._order] = selection
+        return [FractionalSolution(instance, row) for row in unsorted.tolist()]
@@ -1,12 +1,18 @@
-import queue
+import heapq
 import typing
 
-from .bnb_nodes import BnBNode
+from .bnb_nodes import BnBNode, NodeStatus
 
 
 class SearchStrategy:
     """
     Manage the nodes of branch-and-bound search tree with priority queue.
+
+    Next to the priority queue, a second heap of the relaxation values is
+    maintained, such that the upper bound of the queued nodes is available
+    without scanning the queue. Nodes leaving the priority queue are only
+    removed lazily from this heap, i.e., when they reach its top, or when
+    the heap has grown to twice the size of the queue and is rebuilt.
     """
 
     def __init__(self, priority: typing.Callable[[BnBNode], typing.Any]) -> None:
@@ -30,21 +36,32 @@ class SearchStrategy:
             >>> strategy = SearchStrategy(priority_func)
         """
 
-        self.queue = queue.PriorityQueue()
+        self.queue: typing.List[typing.Tuple[typing.Any, BnBNode]] = []
         self._priority = priority
+        # max-heap (by negation) of the relaxation values of feasible nodes
+        self._bounds: typing.List[typing.Tuple[float, int]] = []
+        self._enqueued: typing.Set[int] = set()  # ids of the nodes in the queue
 
     def enqueue(self, node: BnBNode) -> None:
         """
         Add a node to the priority queue.
         """
-        self.queue.put((self._priority(node), node))
+        heapq.heappush(self.queue, (self._priority(node), node))
+        self._enqueued.add(node.node_id)
+        if node.relaxed_solution.is_fractionally_feasible():
+            heapq.heappush(self._bounds, (-node.relaxed_solution.value(), node.node_id))
 
     def next(self) -> BnBNode:
         """
         Get the next node from the priority queue.
         """
         if self.has_next():
-            return self.queue.get()[1]
+            node = heapq.heappop(self.queue)[1]
+            self._enqueued.discard(node.node_id)
+            if len(self._bounds) > 2 * len(self.queue):
+                # e.g., depth-first rarely pops the node with the best bound
+                self._rebuild_bounds()
+            return node
         msg = "No more nodes to explore."
         raise ValueError(msg)
 
@@ -52,19 +69,19 @@ class SearchStrategy:
         """
         Get the number of nodes in the priority queue.
         """
-        return self.queue.qsize()
+        return len(self.queue)
 
     def nodes_in_queue(self) -> typing.Iterable[BnBNode]:
         """
         Get a iterable of nodes in the priority queue.
         """
-        return (node for _, node in self.queue.queue)
+        return (node for _, node in self.queue)
 
     def has_next(self) -> bool:
         """
         Check if there are more nodes to explore in the priority queue.
         """
-        return not self.queue.empty()
+        return bool(self.queue)
 
     def upper_bound(self) -> float:
         """
@@ -73,14 +90,55 @@ class SearchStrategy:
         CAVEAT: This is the upper bound for the solution value of the nodes in the priority queue. Not
         the upper bound for the whole search. To get the true upper bound of the search, use the
         maximum of this upper bound and the largest feasible solution.
+
+        Returns -inf if there are no feasible nodes in the priority queue. Runs in
+        amortized O(1) time, as every node is removed from the bound heap only once.
         """
-        if not self.has_next():
+        while self._bounds and self._bounds[0][1] not in self._enqueued:
+            heapq.heappop(self._bounds)
+        if not self._bounds:
             return float("-inf")
-        return max(
-            (
-                n
-                for n in self.nodes_in_queue()
-                if n.relaxed_solution.is_fractionally_feasible()
-            ),
-            key=lambda node: node.relaxed_solution.value(),
-        ).relaxed_solution.value()
+        return -self._bounds[0][0]
+
+    def on_incumbent_improved(self, incumbent_value: float) -> int:
+        """
+        Remove all nodes from the priority queue that cannot contain a solution
+        better than the new incumbent, i.e., infeasible nodes and nodes with a
+        relaxation value of at most `incumbent_value`. The removed nodes are
+        marked as pruned.
+
+        Instead of pruning them one by one when they are popped, the heaps are
+        rebuilt in a single O(queue size) pass.
+
+        Returns the number of removed nodes.
+        """
+        kept = []
+        for entry in self.queue:
+            node = entry[1]
+            if (
+                node.relaxed_solution.is_fractionally_feasible()
+                and node.relaxed_solution.value() > incumbent_value
+            ):
+                kept.append(entry)
+            else:
+                node.status = NodeStatus.PRUNED
+        num_pruned = len(self.queue) - len(kept)
+        if num_pruned == 0:
+            return 0
+        heapq.heapify(kept)
+        self.queue = kept
+        self._enqueued = {node.node_id for _, node in kept}
+        self._rebuild_bounds()
+        return num_pruned
+
+    def _rebuild_bounds(self) -> None:
+        """
+        Rebuild the bound heap from the queued nodes, dropping the entries of
+        nodes that have left the queue. Takes O(queue size) time.
+        """
+        self._bounds = [
+            (-node.relaxed_solution.value(), node.node_id)
+            for _, node in self.queue
+            if node.relaxed_solution.is_fractionally_feasible()
+        ]
+        heapq.heapify(self._bounds)
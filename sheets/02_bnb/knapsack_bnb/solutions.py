@@ -1,3 +1,5 @@
+import heapq
+import itertools
 import typing
 
 from .relaxation import FractionalSolution
@@ -7,11 +9,37 @@ class SolutionSet:
     """
     Store feasible found solutions,
     determine and keep track the best solution among them.
+
+    Solutions are identified by their selection, such that the same solution
+    is only stored once. Optionally, only the `max_solutions` best solutions
+    are kept. The best solution is always kept.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        on_improvement: typing.Optional[
+            typing.Callable[[FractionalSolution], None]
+        ] = None,
+        max_solutions: typing.Optional[int] = None,
+    ) -> None:
+        """
+        on_improvement: Called with the new best solution whenever the best
+            solution improves.
+        max_solutions: Maximal number of solutions to keep, at least 1, such
+            that the best solution is kept. None for no limit.
+        """
+        if max_solutions is not None and max_solutions < 1:
+            msg = "At least one solution has to be kept."
+            raise ValueError(msg)
         self._best_solution = None
-        self._solutions = []
+        self._best_value = float("-inf")
+        # min-heap of (value, insertion counter, solution), such that the worst
+        # solution can be replaced in O(log k)
+        self._solutions: typing.List[typing.Tuple[float, int, FractionalSolution]] = []
+        self._selections: typing.Set[typing.Tuple[float, ...]] = set()
+        self._counter = itertools.count()
+        self.max_solutions = max_solutions
+        self.on_improvement = on_improvement
 
     def add(self, solution: FractionalSolution) -> None:
         """
@@ -20,20 +48,43 @@ class SolutionSet:
         """
         assert solution.is_fractionally_feasible()
         assert solution.is_integral()
-        if solution not in self._solutions:
-            self._solutions.append(solution)
-        if not self._best_solution or solution.value() > self._best_solution.value():
+        value = solution.value()
+        if solution.selection not in self._selections:
+            entry = (value, next(self._counter), solution)
+            if self.max_solutions is None or len(self._solutions) < self.max_solutions:
+                heapq.heappush(self._solutions, entry)
+                self._selections.add(solution.selection)
+            elif self._solutions and value > self._solutions[0][0]:
+                removed = heapq.heapreplace(self._solutions, entry)[2]
+                self._selections.discard(removed.selection)
+                self._selections.add(solution.selection)
+        if not self._best_solution or value > self._best_value:
             self._best_solution = solution
+            self._best_value = value
+            if self.on_improvement is not None:
+                self.on_improvement(solution)
 
     def best_solution_value(self) -> float:
         """
         Get the value of the best solution in the solution set.
         -inf if no solution is available.
         """
-        return self._best_solution.value() if self._best_solution else float("-inf")
+        return self._best_value
 
     def best_solution(self) -> typing.Optional[FractionalSolution]:
         """
         Get the best solution in the solution set.
         """
         return self._best_solution
+
+    def solutions(self) -> typing.List[FractionalSolution]:
+        """
+        Get the kept solutions, the best first.
+        """
+        return [solution for _, _, solution in sorted(self._solutions, reverse=True)]
+
+    def __len__(self) -> int:
+        """
+        Get the number of kept solutions.
+        """
+        return len(self._solutions)
@@ -0,0 +1,109 @@
+"""
+Detect nodes of the branch and bound that are dominated by an equivalent node.
+
+Two nodes with the same free items and the same weight of the items fixed
+to 1 have the same subproblem: the same relaxations, the same subtree, and
+the same completions of their solutions. Only the value of their fixed items
+can differ, so the node with the lower fixed value cannot lead to a better
+solution and does not need to be searched. Such nodes arise whenever
+different combinations of items have the same weight, e.g., item a packed and
+item b not, or the other way around, for a and b of the same weight.
+
+The set of fixed items (and thus of free items) is hashed with Zobrist
+hashing, i.e., the XOR of a random 64-bit key per fixed item. Different sets
+get the same hash only with a probability of about 2^-64 per pair, which is
+accepted, as storing the sets themselves would take O(n) memory per node.
+"""
+
+import collections
+import random
+import typing
+
+from .compiled import compile_instance
+from .instance import Instance
+from .relaxation import BranchingDecisions
+
+
+class TranspositionTable:
+    """
+    Remember the best fixed value for every subproblem (free items and fixed
+    weight) seen so far. A new node is dominated if a previous node of the
+    same subproblem has at least its fixed value. Only the nodes seen later
+    are recognized as dominated, so an enqueued node is never removed.
+
+    The table keeps at most `max_size` subproblems and evicts the least
+    recently used one, such that its memory is bounded. Evicting only misses
+    duplicates, it never prunes wrongly. For the same reason, the table is
+    not part of checkpoints.
+    """
+
+    def __init__(
+        self, instance: Instance, max_size: int = 1_000_000, seed: int = 0
+    ) -> None:
+        """
+        instance: knapsack problem instance
+        max_size: The maximal number of subproblems kept.
+        seed: The seed for the random keys of the items.
+        """
+        if max_size <= 0:
+            msg = "The transposition table must have a positive size."
+            raise ValueError(msg)
+        self.instance = instance
+        self.max_size = max_size
+        rng = random.Random(seed)
+        self._keys = [rng.getrandbits(64) for _ in instance.items]
+        compiled = compile_instance(instance)
+        self._weights = compiled.weights.tolist()
+        self._values = compiled.values.tolist()
+        self._best_values: typing.OrderedDict[typing.Tuple[int, int], int] = (
+            collections.OrderedDict()
+        )
+        self.num_hits = 0  # dominated nodes
+        self.num_misses = 0
+        self.num_evictions = 0
+
+    def _key(
+        self, branching_decisions: BranchingDecisions
+    ) -> typing.Tuple[typing.Tuple[int, int], int]:
+        """
+        The key of the subproblem (hash of the fixed items and their weight)
+        and the value of the fixed items.
+        """
+        zobrist_hash = 0
+        fixed_weight = 0
+        fixed_value = 0
+        for i, x in branching_decisions.fixed_items():
+            zobrist_hash ^= self._keys[i]
+            if x == 1:
+                fixed_weight += self._weights[i]
+                fixed_value += self._values[i]
+        return (zobrist_hash, fixed_weight), fixed_value
+
+    def is_dominated(self, branching_decisions: BranchingDecisions) -> bool:
+        """
+        Check if a node with the same subproblem and at least the same fixed
+        value has been seen before. Otherwise, the node is remembered.
+        """
+        key, fixed_value = self._key(branching_decisions)
+        best_value = self._best_values.get(key)
+        if best_value is not None:
+            self._best_values.move_to_end(key)
+            if best_value >= fixed_value:
+                self.num_hits += 1
+                return True
+        self.num_misses += 1
+        self._best_values[key] = fixed_value
+        if len(self._best_values) > self.max_size:
+            self._best_values.popitem(last=False)
+            self.num_evictions += 1
+        return False
+
+    def hit_rate(self) -> float:
+        """
+        The fraction of the checked nodes that were dominated.
+        """
+        num_checks = self.num_hits + self.num_misses
+        return self.num_hits / num_checks if num_checks else 0.0
+
+    def __len__(self) -> int:
+        return len(self._best_values)
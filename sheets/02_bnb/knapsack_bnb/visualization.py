@@ -1,34 +1,125 @@
 """
 This code creates an interactive visualization of a branch and bound tree.
+
+For large searches, the number of recorded nodes can be limited, and the node
+details can be streamed to a sidecar file during the search instead of being
+kept in memory. The sidecar file is only loaded by the HTML page when the
+details are needed.
 """
 
+import functools
+import json
+import shutil
+import tempfile
+import weakref
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from jinja2 import Template
-from pydantic import BaseModel
 
 from .bnb_nodes import BnBNode
 from .instance import Instance
 from .relaxation import FractionalSolution
 
+# The id of the artificial root of a resumed search. Real node ids are >= 0.
+_RESUMED_ROOT_ID = -1
+
+
+def _remove_file(file) -> None:
+    """
+    Close and delete a temporary file that has been created with delete=False.
+    """
+    file.close()
+    Path(file.name).unlink(missing_ok=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_template(name: str) -> Template:
+    """
+    Load and compile a template only once.
+    """
+    with (Path(__file__).parent / "templates" / name).open() as file:
+        return Template(file.read())
+
+
+class BnBTree:
+    """
+    A node of the visualized tree. The tree is stored flat, i.e., each node
+    only knows its parent.
+    """
 
-class BnBTree(BaseModel):
-    node_id: int
-    created_at: int
-    processed_at: Optional[int] = None
-    label: str
-    color: str
-    children: list["BnBTree"] = []
+    __slots__ = ("color", "created_at", "label", "node_id", "parent_id", "processed_at")
+
+    def __init__(
+        self,
+        node_id: int,
+        parent_id: Optional[int],
+        created_at: int,
+        label: str,
+        color: str,
+    ) -> None:
+        self.node_id = node_id
+        self.parent_id = parent_id
+        self.created_at = created_at
+        self.processed_at: Optional[int] = None
+        self.label = label
+        self.color = color
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "node_id": self.node_id,
+            "parent_id": self.parent_id,
+            "created_at": self.created_at,
+            "processed_at": self.processed_at,
+            "label": self.label,
+            "color": self.color,
+        }
 
 
 class BnBVisualization:
-    def __init__(self, instance: Instance):
+    def __init__(
+        self,
+        instance: Instance,
+        max_nodes: Optional[int] = None,
+        stream_details: bool = False,
+    ):
+        """
+        instance: knapsack problem instance
+        max_nodes: Only record the first `max_nodes` created nodes. None for no limit.
+        stream_details: Write the details of the processed nodes to a file
+            during the search instead of keeping them in memory. The file is
+            placed next to the HTML file by `visualize`. If the visualization
+            is not created, call `close` to delete it, which also happens
+            when this object is garbage collected.
+        """
         self.root = None
-        self.node_links = {}
+        self.node_links: Dict[int, BnBTree] = {}
         self.instance = instance
-        self.node_detail_texts = {}
+        self.max_nodes = max_nodes
+        self.node_detail_texts: Dict[int, str] = {}
         self.iterations = []  # id of node processed in iteration
+        self._details_file = None
+        self._remove_details_file = None
+        if stream_details:
+            self._details_file = tempfile.NamedTemporaryFile(  # noqa: SIM115
+                "w", suffix=".js", delete=False
+            )
+            self._remove_details_file = weakref.finalize(
+                self, _remove_file, self._details_file
+            )
+            self._details_file.write(
+                "window.bnbNodeDetails = window.bnbNodeDetails || {};\n"
+            )
+
+    def close(self) -> None:
+        """
+        Delete the streamed node details, if any. The visualization cannot
+        be created afterwards anymore.
+        """
+        if self._remove_details_file is not None:
+            self._remove_details_file()
+            self._remove_details_file = None
+        self._details_file = None
 
     def _get_node_color(self, node: BnBNode) -> str:
         if (
@@ -41,22 +132,57 @@ class BnBVisualization:
         )
 
     def on_new_node_in_tree(self, node: BnBNode):
-        color = self._get_node_color(node)
-        label = f"{node.relaxed_solution.value():.1f}"
+        self._record_node(node, node.parent_id)
+
+    def on_search_resumed(self, open_nodes: List[BnBNode]):
+        """
+        Record the open nodes of a search resumed from a checkpoint. Their
+        ancestors are not known anymore, so they become the children of an
+        artificial root, which counts as processed in the first iteration.
+        """
+        assert self.root is None, "Root already exists."
+        self.root = BnBTree(
+            node_id=_RESUMED_ROOT_ID,
+            parent_id=None,
+            label="Resumed",
+            color="#adb5bd",
+            created_at=0,
+        )
+        self.node_links[_RESUMED_ROOT_ID] = self.root
+        self.iterations.append(_RESUMED_ROOT_ID)
+        self.root.processed_at = 0
+        self._add_node_details(
+            _RESUMED_ROOT_ID,
+            "<p>The search has been resumed from a checkpoint with the open nodes below.</p>",
+        )
+        for node in open_nodes:
+            self._record_node(node, _RESUMED_ROOT_ID)
+
+    def _record_node(self, node: BnBNode, parent_id: Optional[int]):
+        if self.max_nodes is not None and len(self.node_links) >= self.max_nodes:
+            return
+        if parent_id is not None and parent_id not in self.node_links:
+            return  # the parent has not been recorded
         data = BnBTree(
             node_id=node.node_id,
-            label=label,
-            color=color,
-            children=[],
+            parent_id=parent_id,
+            label=f"{node.relaxed_solution.value():.1f}",
+            color=self._get_node_color(node),
             created_at=len(self.iterations),
         )
-        if node.parent_id is None:
+        if parent_id is None:
             assert self.root is None, "Root already exists."
             self.root = data
-        else:
-            self.node_links[node.parent_id].children.append(data)
         self.node_links[node.node_id] = data
 
+    def _add_node_details(self, node_id: int, node_info: str):
+        if self._details_file is not None:
+            self._details_file.write(
+                f"window.bnbNodeDetails[{node_id}] = {json.dumps(node_info)};\n"
+            )
+        else:
+            self.node_detail_texts[node_id] = node_info
+
     def on_node_processed(
         self,
         node: BnBNode,
@@ -65,45 +191,47 @@ class BnBVisualization:
         best_solution: Optional[FractionalSolution],
         heuristic_solutions: List[FractionalSolution],
     ):
+        if node.node_id not in self.node_links:
+            return  # not recorded
         self.iterations.append(node.node_id)
-        self.node_links[node.node_id].processed_at = len(self.iterations) - 1
-        if node.parent_id is not None:
-            assert self.node_links[node.parent_id].processed_at is not None
-            assert (
-                self.node_links[node.parent_id].processed_at
-                < self.node_links[node.node_id].processed_at
-            )
-        with (Path(__file__).parent / "./templates/node.jinja2.html").open() as file:
-            template_node_info = Template(file.read())
-            node_info = template_node_info.render(
-                node=node,
-                lb=lb,
-                ub=ub,
-                heuristic_solutions=heuristic_solutions,
-                best_solution=best_solution,
-            )
-            self.node_detail_texts[node.node_id] = node_info
+        data = self.node_links[node.node_id]
+        data.processed_at = len(self.iterations) - 1
+        if data.parent_id is not None:
+            assert self.node_links[data.parent_id].processed_at is not None
+            assert self.node_links[data.parent_id].processed_at < data.processed_at
+        node_info = _load_template("node.jinja2.html").render(
+            node=node,
+            lb=lb,
+            ub=ub,
+            heuristic_solutions=heuristic_solutions,
+            best_solution=best_solution,
+        )
+        self._add_node_details(node.node_id, node_info)
 
     def visualize(self, path: str = "output.html"):
         if self.root is None:
             msg = "No nodes to visualize."
             raise ValueError(msg)
-        with (
-            Path(__file__).parent / "./templates/instance.jinja2.html"
-        ).open() as file:
-            template_instance = Template(file.read())
-            instance_info = template_instance.render(instance=self.instance)
-        with (Path(__file__).parent / "./templates/bnb.jinja2.html").open() as file:
-            template = Template(file.read())
+        instance_info = _load_template("instance.jinja2.html").render(
+            instance=self.instance
+        )
+        details_src = None
+        if self._details_file is not None:
+            self._details_file.close()
+            details_path = Path(path).with_suffix(".details.js")
+            shutil.copyfile(self._details_file.name, details_path)
+            self.close()
+            details_src = details_path.name
         with Path(path).open("w") as file:
-            data = str(self.root.model_dump_json())
+            data = json.dumps([node.to_dict() for node in self.node_links.values()])
             file.write(
-                template.render(
+                _load_template("bnb.jinja2.html").render(
                     tree_data=data,
                     num_iterations=len(self.iterations) - 1,
                     iterations=self.iterations,
                     instance_info=instance_info,
-                    node_details=self.node_detail_texts,
+                    node_details=json.dumps(self.node_detail_texts),
+                    node_details_src=json.dumps(details_src),
                 )
             )
             print("Visualization saved to", path)